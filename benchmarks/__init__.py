@@ -0,0 +1,17 @@
+"""
+benchmarks
+Micro-benchmarks dos caminhos quentes (read_ia, curso, agenda) com dados sintéticos.
+
+Uso (na raiz do projeto):
+  python -m benchmarks.run                          # escalas 1k e 10k
+  python -m benchmarks.run --escalas 1000,10000,100000
+  python -m benchmarks.run --comparar benchmarks/resultados/A.json benchmarks/resultados/B.json
+"""
+
+import sys
+from pathlib import Path
+
+# os módulos de src/ se importam pelo nome (from read_ia import ...), como no main.py
+SRC = Path(__file__).resolve().parent.parent / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
@@ -0,0 +1,170 @@
+"""
+carga.py
+Teste de carga do fluxo inteiro (main.main) sem tocar no Google:
+gera N monitorias + payloads do Read IA, sobe os servidores fake de Calendar e Forms
+(servidores_fake.py), aponta o agenda/forms_http pra eles e roda o main de verdade
+com todos os caches/registro de envios numa pasta temporária.
+
+  python -m benchmarks.carga --registros 1000
+  python -m benchmarks.carga --registros 10000 --dias 10 --latencia-ms 80 --jitter-ms 40 --p429 0.02 --perro 0.01
+
+Mostra registros/s e a latência de cada envio (p50/p95/p99/max, do lado do cliente,
+com retentativas) e salva o resultado em JSON como o benchmarks.run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from benchmarks import geradores
+from benchmarks.servidores_fake import Servidor, app_calendar, app_forms
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentil(ordenados: list[float], p: float) -> float:
+    if not ordenados:
+        return 0.0
+    return ordenados[max(0, math.ceil(p * len(ordenados)) - 1)]
+
+
+def rodar(args) -> dict:
+    tmp = Path(tempfile.mkdtemp(prefix="carga_monitorias_"))
+    porta_cal, porta_forms = _porta_livre(), _porta_livre()
+
+    # antes de importar o projeto: agenda e forms_http leem isso ao serem importados
+    os.environ["AGENDA_API_URL"] = f"http://127.0.0.1:{porta_cal}/calendar/v3/"
+    os.environ["FORMS_BASE_URL"] = f"http://127.0.0.1:{porta_forms}"
+    os.environ["AGENDA_CALENDARIOS"] = "primary"
+    os.environ["AGENDA_HEADLESS"] = "1"
+
+    import agenda
+    import cache_cursos
+    import main as principal
+    import metricas
+    import read_ia
+    import registro_envios
+    import requests
+    from benchmarks.run import PASTA_RESULTADOS, _commit
+
+    # nada de data/ do projeto: índice, caches e registro de envios ficam no tmp
+    read_ia.PASTA_READ = tmp / "read_payloads"
+    read_ia.INDICE_PATH = tmp / "read_index.sqlite"
+    agenda.CACHE_PATH = tmp / "agenda_cache.sqlite"
+    cache_cursos.CACHE_PATH = tmp / "cursos_cache.sqlite"
+    registro_envios.LEDGER_PATH = tmp / "forms_ledger.sqlite"
+
+    try:
+        fim = date.today()
+        inicio = fim - timedelta(days=args.dias - 1)
+        print(f"🧪 Gerando {args.registros} monitorias em {args.dias} dia(s) ({tmp}) ...")
+        eventos = geradores.gerar_dataset(
+            read_ia.PASTA_READ, args.registros, args.dias, args.transcript_kb, fim=fim
+        )
+        todos = [e for lista in eventos.values() for e in lista]
+
+        cal = Servidor(app_calendar(todos, args.pagina, args.latencia_cal_ms / 1000), porta=porta_cal)
+        frm = Servidor(
+            app_forms(
+                args.latencia_ms / 1000, args.jitter_ms / 1000, args.p429, args.perro,
+                args.retry_after, semente=42,
+            ),
+            porta=porta_forms,
+        )
+        with cal, frm:
+            print(f"🚀 Rodando main ({inicio} a {fim}) contra {cal.url} e {frm.url} ...")
+            saida = sys.stdout if args.verbose else open(os.devnull, "w", encoding="utf-8")
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(saida):
+                principal.main([
+                    "--from", inicio.isoformat(), "--to", fim.isoformat(),
+                    "--metricas-json", str(tmp / "metricas.json"),
+                ])
+            total = time.perf_counter() - t0
+            if saida is not sys.stdout:
+                saida.close()
+            stats_cal = requests.get(cal.url + "/_stats", timeout=5).json()
+            stats_forms = requests.get(frm.url + "/_stats", timeout=5).json()
+
+        dados = metricas.resumo()
+        envios = metricas.amostras("forms_envio")
+        contadores = dados["contadores"]
+        enviados = int(contadores.get("forms_enviados", 0))
+        lote = dados["etapas"].get("forms_lote", {}).get("total_s", 0.0)
+
+        return {
+            "commit": _commit(),
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            "parametros": {k: v for k, v in vars(args).items() if k not in ("saida", "verbose", "manter")},
+            "registros": args.registros,
+            "total_s": round(total, 3),
+            "registros_por_s": round(args.registros / total, 1) if total else 0.0,
+            "envios_por_s_no_lote": round(enviados / lote, 1) if lote else 0.0,
+            "forms_enviados": enviados,
+            "forms_falhas": int(contadores.get("forms_falhas", 0)),
+            "latencia_envio_s": {
+                "p50": round(_percentil(envios, 0.50), 4),
+                "p95": round(_percentil(envios, 0.95), 4),
+                "p99": round(_percentil(envios, 0.99), 4),
+                "max": round(envios[-1], 4) if envios else 0.0,
+            },
+            "etapas": dados["etapas"],
+            "servidor_calendar": stats_cal,
+            "servidor_forms": stats_forms,
+        }, PASTA_RESULTADOS
+    finally:
+        if args.manter:
+            print(f"   dados mantidos em {tmp}")
+        else:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Carga do fluxo completo contra Calendar/Forms fake")
+    ap.add_argument("--registros", type=int, default=1000)
+    ap.add_argument("--dias", type=int, default=5, help="dias do backfill (--from/--to) em que os registros se espalham")
+    ap.add_argument("--transcript-kb", type=int, default=2)
+    ap.add_argument("--pagina", type=int, default=250, help="eventos por página no Calendar fake")
+    ap.add_argument("--latencia-cal-ms", type=float, default=0.0)
+    ap.add_argument("--latencia-ms", type=float, default=50.0, help="latência do Forms fake")
+    ap.add_argument("--jitter-ms", type=float, default=25.0)
+    ap.add_argument("--p429", type=float, default=0.0)
+    ap.add_argument("--perro", type=float, default=0.0)
+    ap.add_argument("--retry-after", type=float, help="Retry-After (s) devolvido nos 429")
+    ap.add_argument("--saida", type=Path, help="JSON de saída (padrão: benchmarks/resultados/carga_<data>_<commit>.json)")
+    ap.add_argument("--verbose", action="store_true", help="mostra a saída do main")
+    ap.add_argument("--manter", action="store_true", help="não apaga a pasta temporária")
+    args = ap.parse_args(argv)
+
+    resultado, pasta_resultados = rodar(args)
+
+    lat = resultado["latencia_envio_s"]
+    print(f"\n📊 {resultado['registros']} registros em {resultado['total_s']:.2f}s "
+          f"→ {resultado['registros_por_s']} registros/s ({resultado['envios_por_s_no_lote']} envios/s no lote)")
+    print(f"   enviados: {resultado['forms_enviados']}  falhas: {resultado['forms_falhas']}  "
+          f"forms fake: {resultado['servidor_forms']}")
+    print(f"   latência por envio: p50={lat['p50']:.3f}s p95={lat['p95']:.3f}s p99={lat['p99']:.3f}s max={lat['max']:.3f}s")
+
+    saida = args.saida or pasta_resultados / f"carga_{datetime.now():%Y%m%d-%H%M%S}_{resultado['commit']}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultado, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"💾 Resultado salvo em {saida}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,146 @@
+"""
+corpus_cursos.py
+Corpus fixo de summaries com a saída esperada de curso.inferir_cursos_do_summary,
+pra pegar mudança de comportamento ao mexer no curso.py (scanner, trie, fuzzy, lote).
+
+  python -m benchmarks.corpus_cursos              # confere; sai com erro se algum mudou
+  python -m benchmarks.corpus_cursos --lote       # confere também o inferir_cursos_em_lote
+  python -m benchmarks.corpus_cursos --atualizar  # mudança de regra intencional: regrava o esperado
+
+Mudou a saída de propósito? Regrave o esperado no mesmo commit. Se a mudança foi só de
+código (não das tabelas do curso.py), inclua algo novo no cache_cursos.impressao_regras,
+senão o cache continua devolvendo a saída antiga.
+O corpus em si (benchmarks/corpus/cursos.jsonl) é gerado uma vez com --gerar e versionado:
+não depende do geradores.py continuar igual.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import unicodedata
+from pathlib import Path
+
+from benchmarks import geradores
+
+from curso import inferir_cursos_do_summary, inferir_cursos_em_lote
+
+CORPUS = Path(__file__).resolve().parent / "corpus" / "cursos.jsonl"
+
+# casos escritos à mão: gatilhos na borda da janela, só futuro, módulo X de python, erro de digitação...
+CASOS_FIXOS = [
+    "",
+    "O aluno não apareceu.",
+    "Ele concluiu Python I.",
+    "Ele concluiu python 2 e react native.",
+    "Para a próxima semana ele vai fazer Flutter.",
+    "Ele concluiu SQL. Para a próxima semana ele vai fazer SQL.",
+    "Ele terminou a meta. Falou de Linux. Depois de Scratch. E por fim de Android.",
+    "Ele assistiu às aulas. Nada demais. Nada demais. Fizemos React.",
+    "Concluiu o módulo 3 de python e o modulo 2 python.",
+    "O monitor perguntou se ele fez a meta e ele falou que viu HTML e CSS.",
+    "Ele finalizou Programacao Orientada a Objetos.",
+    "Ela completou Desenvolvimento de websites com mentalidade ágil.",
+    "Ele entregou o projeto de Framework Full Stack para Web!",
+    "Ela terminou Teste de Software para Mobile; vai ver teste web na semana que vem.",
+    "Ele concluiu o curso de Javascrpt.",
+    "Ela concluiu Fundamentos de interfase.",
+    "Ele concluiu o conteúdo de Programaçao Multiplataforma com Fluter.",
+    "Ele concluiu a meta de APIs RESTful\nE também NoSQL",
+    "ELE CONCLUIU PYTHON II E BANCO DE DADOS NÃO RELACIONAL.",
+    "Ele deve ver Python. Ele concluiu. Nada mais.",
+    "Semana passada: Introdução à Web, Padrões de Projeto e No Code.",
+    "Ele consumiu o conteúdo? Não consumiu nada da meta.",
+]
+
+
+def _sem_acento(s: str) -> str:
+    return "".join(ch for ch in unicodedata.normalize("NFKD", s) if not unicodedata.combining(ch))
+
+
+def _com_erro(rng: random.Random, s: str) -> str:
+    # troca ou apaga uma letra de uma palavra comprida (exercita o fallback fuzzy)
+    palavras = s.split(" ")
+    longas = [i for i, p in enumerate(palavras) if len(p) >= 6]
+    if not longas:
+        return s
+    i = rng.choice(longas)
+    p = palavras[i]
+    j = rng.randrange(1, len(p) - 1)
+    palavras[i] = p[:j] + p[j + 1:] if rng.random() < 0.5 else p[:j] + p[j + 1] + p[j] + p[j + 2:]
+    return " ".join(palavras)
+
+
+def gerar_corpus(n: int, semente: int = 7) -> list[str]:
+    rng = random.Random(semente)
+    summaries = list(CASOS_FIXOS)
+    for _ in range(n):
+        s = geradores.summary(rng, frases=rng.randint(1, 10))
+        sorteio = rng.random()
+        if sorteio < 0.1:
+            s = _sem_acento(s)
+        elif sorteio < 0.2:
+            s = s.upper()
+        elif sorteio < 0.3:
+            s = s.replace(". ", "\n")
+        elif sorteio < 0.4:
+            s = s.replace(". ", "; ")
+        if rng.random() < 0.2:
+            s = _com_erro(rng, s)
+        if rng.random() < 0.1:
+            s += f" Ele concluiu o módulo {rng.randint(1, 9)} de python."
+        summaries.append(s)
+    return summaries
+
+
+def ler_corpus(path: Path = CORPUS) -> list[dict]:
+    with path.open(encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def gravar_corpus(casos: list[dict], path: Path = CORPUS) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="\n") as f:
+        for caso in casos:
+            f.write(json.dumps(caso, ensure_ascii=False) + "\n")
+
+
+def conferir(casos: list[dict], obtidos: list[list[str]], rotulo: str) -> int:
+    diferentes = [(i, c, o) for i, (c, o) in enumerate(zip(casos, obtidos)) if c["cursos"] != o]
+    for i, caso, obtido in diferentes[:20]:
+        print(f"❌ [{rotulo}] caso {i}: esperado {caso['cursos']}, veio {obtido}")
+        print(f"   {caso['summary'][:200]!r}")
+    if len(diferentes) > 20:
+        print(f"   ... e mais {len(diferentes) - 20}")
+    print(f"{'✅' if not diferentes else '❌'} {rotulo}: {len(casos) - len(diferentes)}/{len(casos)} iguais ao esperado")
+    return len(diferentes)
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Confere o curso.py contra o corpus de referência")
+    ap.add_argument("--lote", action="store_true", help="confere também o inferir_cursos_em_lote (ProcessPool)")
+    ap.add_argument("--atualizar", action="store_true", help="regrava a saída esperada com o curso.py atual")
+    ap.add_argument("--gerar", type=int, metavar="N", help="gera um corpus novo (N summaries + casos fixos)")
+    args = ap.parse_args(argv)
+
+    if args.gerar:
+        summaries = gerar_corpus(args.gerar)
+    else:
+        summaries = [c["summary"] for c in ler_corpus()]
+
+    if args.gerar or args.atualizar:
+        gravar_corpus([{"summary": s, "cursos": inferir_cursos_do_summary(s)} for s in summaries])
+        print(f"💾 {len(summaries)} casos gravados em {CORPUS}")
+        return
+
+    casos = ler_corpus()
+    erros = conferir(casos, [inferir_cursos_do_summary(c["summary"]) for c in casos], "inferir_cursos_do_summary")
+    if args.lote:
+        erros += conferir(casos, list(inferir_cursos_em_lote(c["summary"] for c in casos)), "inferir_cursos_em_lote")
+    sys.exit(1 if erros else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,150 @@
+"""
+geradores.py
+Dados sintéticos no formato do que o webhook_read grava e do que a agenda devolve:
+- payloads meeting_end do Read IA (com transcript do tamanho de uma monitoria real)
+- summaries em português que passam pelos CONCLUSAO_PATTERNS / FUTURO_PATTERNS
+- eventos do Google Calendar das monitorias
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import string
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from read_ia import pasta_particao
+
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Heitor", "Isabela", "João",
+         "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Thiago", "Vitória", "Yuri"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Costa", "Almeida", "Rocha", "Gomes"]
+AGENTES = ["Natanael", "Douglas", "Pedro", "Alex"]
+
+CURSOS_CITADOS = [
+    "Python I", "python 2", "React JS", "react native", "banco de dados", "SQL", "NoSQL", "Flutter",
+    "Linux", "Scratch", "HTML e CSS", "introdução à web", "APIs RESTful", "POO", "padrões de projeto",
+    "JavaScript", "Android", "teste mobile", "framework front-end", "pyton ii",
+]
+
+FRASES_CONCLUSAO = [
+    "O aluno concluiu a meta de {c} da semana passada",
+    "{n} cumpriu a meta e finalizou o módulo de {c}",
+    "Na semana passada ele assistiu às aulas de {c}",
+    "O monitor perguntou se ele fez a meta de {c} e ele confirmou",
+    "Ela terminou as atividades de {c} e enviou o projeto",
+    "Conseguiu avançar bastante e completou o conteúdo de {c}",
+]
+FRASES_FUTURO = [
+    "Para a próxima semana ele vai fazer {c}",
+    "Como meta para a semana que vem ficou {c}",
+    "Ela precisa começar {c} na próxima semana",
+    "Ele deve ver o módulo 3 de {c}",
+]
+FRASES_NEUTRAS = [
+    "A conversa começou com uma revisão das dificuldades da semana",
+    "{n} comentou que teve pouco tempo por causa do trabalho",
+    "O monitor explicou novamente como funcionam as funções e os laços",
+    "Foram tiradas dúvidas sobre a plataforma e sobre o certificado",
+    "A sessão terminou com combinados sobre a rotina de estudos",
+    "Ele disse que tem interesse em aprender mais rápido e de forma prática",
+]
+
+
+def matricula(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_uppercase, k=3)) + str(rng.randint(10000, 99999))
+
+
+def meet_id(rng: random.Random) -> str:
+    letras = string.ascii_lowercase
+    return "-".join("".join(rng.choices(letras, k=k)) for k in (3, 4, 3))
+
+
+def summary(rng: random.Random, frases: int = 12) -> str:
+    nome = rng.choice(NOMES)
+    partes = []
+    for _ in range(frases):
+        r = rng.random()
+        if r < 0.25:
+            modelo = rng.choice(FRASES_CONCLUSAO)
+        elif r < 0.4:
+            modelo = rng.choice(FRASES_FUTURO)
+        else:
+            modelo = rng.choice(FRASES_NEUTRAS)
+        partes.append(modelo.format(c=rng.choice(CURSOS_CITADOS), n=nome))
+    return ". ".join(partes) + "."
+
+
+def _transcript(rng: random.Random, kb: int, nomes: list[str]) -> list[dict]:
+    blocos = []
+    tamanho = 0
+    while tamanho < kb * 1024:
+        texto = " ".join(rng.choice(FRASES_NEUTRAS).format(n=rng.choice(nomes), c="Python") for _ in range(3))
+        blocos.append({"speaker": {"name": rng.choice(nomes)}, "text": texto})
+        tamanho += len(texto) + 40
+    return blocos
+
+
+def titulo_monitoria(nome: str, mat: str, agente: str) -> str:
+    return f"{nome} {mat} and {agente}"
+
+
+def payload(rng: random.Random, dia: date, titulo: str, mid: str, transcript_kb: int = 8) -> dict:
+    inicio = datetime(dia.year, dia.month, dia.day, rng.randint(11, 23), rng.choice((0, 30)), tzinfo=timezone.utc)
+    nomes = titulo.split(" and ")
+    return {
+        "session_id": "".join(rng.choices(string.ascii_uppercase + string.digits, k=26)),
+        "trigger": "meeting_end",
+        "title": titulo,
+        "start_time": inicio.isoformat().replace("+00:00", "Z"),
+        "end_time": (inicio + timedelta(minutes=30)).isoformat().replace("+00:00", "Z"),
+        "platform": "google_meet",
+        "platform_meeting_id": mid,
+        "participants": [{"name": n, "email": None} for n in nomes],
+        "owner": {"name": nomes[-1], "email": None},
+        "summary": summary(rng),
+        "action_items": [{"text": rng.choice(FRASES_FUTURO).format(c=rng.choice(CURSOS_CITADOS))} for _ in range(3)],
+        "key_questions": [],
+        "topics": [],
+        "report_url": f"https://app.read.ai/analytics/meetings/{rng.getrandbits(64):016x}",
+        "transcript": {"speaker_blocks": _transcript(rng, transcript_kb, nomes)},
+    }
+
+
+def evento(rng: random.Random, dia: date, titulo: str, mid: str) -> dict:
+    inicio = datetime(dia.year, dia.month, dia.day, rng.randint(8, 20), 0)
+    return {
+        "id": f"{rng.getrandbits(64):016x}",
+        "status": "confirmed",
+        "summary": titulo,
+        "start": {"dateTime": inicio.isoformat() + "-03:00"},
+        "hangoutLink": f"https://meet.google.com/{mid}",
+        "description": "Monitoria semanal",
+    }
+
+
+def gerar_dataset(
+    pasta: Path,
+    n_payloads: int,
+    dias: int = 30,
+    transcript_kb: int = 8,
+    semente: int = 42,
+    fim: date | None = None,
+) -> dict[str, list[dict]]:
+    """
+    Grava n_payloads JSON em `pasta` (layout particionado do webhook_read), espalhados
+    por `dias` dias até `fim`. Retorna {data: [eventos da agenda daquele dia]}.
+    """
+    rng = random.Random(semente)
+    fim = fim or date.today()
+    eventos: dict[str, list[dict]] = {}
+    for i in range(n_payloads):
+        dia = fim - timedelta(days=i % dias)
+        titulo = titulo_monitoria(f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}", matricula(rng), rng.choice(AGENTES))
+        mid = meet_id(rng)
+        p = payload(rng, dia, titulo, mid, transcript_kb)
+        destino = pasta_particao(pasta, p)
+        destino.mkdir(parents=True, exist_ok=True)
+        (destino / f"read_{i:07d}_{p['session_id']}.json").write_text(json.dumps(p, ensure_ascii=False), encoding="utf-8")
+        eventos.setdefault(dia.isoformat(), []).append(evento(rng, dia, titulo, mid))
+    return eventos
@@ -0,0 +1,124 @@
+"""
+memoria.py
+Pico de RSS e tempo de carga dos payloads do Read IA, cada modo num processo novo
+(o pico é do processo inteiro, então não dá pra medir tudo no mesmo):
+
+- json_completo: o jeito antigo, todos os JSON inteiros em memória (transcript incluso)
+- indice_frio:   read_ia._carregar_payloads() montando o índice do zero (PayloadRead enxuto)
+- indice_quente: read_ia._carregar_payloads() com o índice já pronto (só stat + consulta)
+
+  python -m benchmarks.memoria --escalas 1000,10000 --transcript-kb 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from benchmarks import geradores
+
+MODOS = ("json_completo", "indice_frio", "indice_quente")
+
+
+def _rss_pico_kb() -> int:
+    # Linux: VmHWM é o pico do processo atual (o ru_maxrss pode herdar o do pai através do exec)
+    try:
+        for linha in Path("/proc/self/status").read_text().splitlines():
+            if linha.startswith("VmHWM:"):
+                return int(linha.split()[1])
+    except OSError:
+        pass
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico // 1024 if sys.platform == "darwin" else pico
+
+
+def _filho(modo: str, pasta: Path, indice: Path) -> dict:
+    import read_ia
+
+    read_ia.PASTA_READ = pasta
+    read_ia.INDICE_PATH = indice
+    base = _rss_pico_kb()
+
+    t0 = time.perf_counter()
+    if modo == "json_completo":
+        registros = []
+        for arq in pasta.rglob("*.json"):
+            p = json.loads(arq.read_text(encoding="utf-8"))
+            if (p.get("trigger") or "").strip().lower() == "meeting_end":
+                p["_arquivo"] = str(arq)
+                registros.append(p)
+    else:
+        registros = read_ia._carregar_payloads()
+    segundos = time.perf_counter() - t0
+
+    pico = _rss_pico_kb()
+    return {
+        "registros": len(registros),
+        "segundos": round(segundos, 4),
+        "rss_base_kb": base,
+        "rss_pico_kb": pico,
+        "rss_carga_kb": pico - base,
+    }
+
+
+def _rodar_filho(modo: str, pasta: Path, indice: Path) -> dict:
+    r = subprocess.run(
+        [sys.executable, "-m", "benchmarks.memoria", "--filho", modo, str(pasta), str(indice)],
+        capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parent.parent,
+    )
+    return json.loads(r.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Pico de RSS e tempo de carga dos payloads do Read IA")
+    ap.add_argument("--escalas", default="1000,10000")
+    ap.add_argument("--transcript-kb", type=int, default=8)
+    ap.add_argument("--dias", type=int, default=30)
+    ap.add_argument("--saida", type=Path, help="JSON de saída (padrão: benchmarks/resultados/memoria_<data>_<commit>.json)")
+    ap.add_argument("--filho", nargs=3, metavar=("MODO", "PASTA", "INDICE"), help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.filho:
+        modo, pasta, indice = args.filho
+        print(json.dumps(_filho(modo, Path(pasta), Path(indice))))
+        return
+
+    from benchmarks.run import PASTA_RESULTADOS, _commit
+
+    resultado = {
+        "commit": _commit(),
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "parametros": {"transcript_kb": args.transcript_kb, "dias": args.dias},
+        "escalas": {},
+    }
+    for n in (int(x) for x in args.escalas.split(",") if x.strip()):
+        tmp = Path(tempfile.mkdtemp(prefix=f"bench_memoria_{n}_"))
+        try:
+            print(f"🧪 Gerando {n} payloads ({args.transcript_kb} KB de transcript cada) ...")
+            geradores.gerar_dataset(tmp / "read_payloads", n, args.dias, args.transcript_kb, fim=date.today())
+            res = {}
+            for modo in MODOS:
+                res[modo] = _rodar_filho(modo, tmp / "read_payloads", tmp / "read_index.sqlite")
+                r = res[modo]
+                print(f"   {modo:14s} {r['registros']:>7d} registros  {r['segundos']:8.3f}s  "
+                      f"+{r['rss_carga_kb'] / 1024:8.1f} MB (pico {r['rss_pico_kb'] / 1024:.1f} MB)")
+            resultado["escalas"][str(n)] = res
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    saida = args.saida or PASTA_RESULTADOS / f"memoria_{datetime.now():%Y%m%d-%H%M%S}_{resultado['commit']}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultado, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"💾 Resultado salvo em {saida}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
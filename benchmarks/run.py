@@ -0,0 +1,212 @@
+"""
+run.py
+Roda os micro-benchmarks e salva o resultado em JSON (um arquivo por execução,
+com o commit no nome) pra comparar antes/depois de uma mudança.
+
+  python -m benchmarks.run --escalas 1000,10000,100000
+  python -m benchmarks.run --comparar benchmarks/resultados/A.json benchmarks/resultados/B.json
+
+Cobertura:
+- read_ia._carregar_payloads: índice frio (lê todos os JSON), quente (só stat) e um dia só
+- read_ia.analisar_monitoria (uma a uma) e analisar_monitorias (lote do dia)
+- curso.inferir_cursos_do_summary
+- agenda.extrair_dados / agenda.extrair_meet_id
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from benchmarks import geradores
+
+import read_ia
+from agenda import extrair_dados, extrair_meet_id
+from curso import inferir_cursos_do_summary
+
+RAIZ = Path(__file__).resolve().parent.parent
+PASTA_RESULTADOS = Path(__file__).resolve().parent / "resultados"
+
+# analisar_monitoria consulta o índice a cada chamada; acima disso vira só amostra
+MAX_CHAMADAS_UNITARIAS = 200
+
+
+def _commit() -> str:
+    try:
+        r = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True)
+        return r.stdout.strip() or "sem-git"
+    except OSError:
+        return "sem-git"
+
+
+def _medir(fn, itens: int, repeticoes: int, preparar=None) -> dict:
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        t0 = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - t0)
+    melhor = min(tempos)
+    return {
+        "itens": itens,
+        "repeticoes": repeticoes,
+        "melhor_s": round(melhor, 6),
+        "mediana_s": round(statistics.median(tempos), 6),
+        "us_por_item": round(melhor / max(itens, 1) * 1e6, 3),
+    }
+
+
+def _apontar_read_ia(pasta: Path, indice: Path) -> None:
+    if read_ia._con is not None:
+        read_ia._con.close()
+    read_ia._con = None
+    read_ia._escopos_atualizados.clear()
+    read_ia.PASTA_READ = pasta
+    read_ia.INDICE_PATH = indice
+
+
+def bench_read_ia(n: int, eventos: dict[str, list[dict]], pasta: Path, repeticoes: int) -> dict:
+    indice = pasta.parent / "read_index.sqlite"
+    dia = max(eventos)
+    res = {}
+
+    def indice_frio():
+        _apontar_read_ia(pasta, indice)
+        indice.unlink(missing_ok=True)
+
+    res["carregar_payloads_frio"] = _medir(lambda: read_ia._carregar_payloads(), n, repeticoes, indice_frio)
+    # mesmo índice, processo "novo": só stat + consulta
+    res["carregar_payloads_quente"] = _medir(
+        lambda: read_ia._carregar_payloads(), n, repeticoes, lambda: _apontar_read_ia(pasta, indice)
+    )
+    linhas_dia = read_ia._carregar_payloads(dia)
+    res["carregar_payloads_dia"] = _medir(
+        lambda: read_ia._carregar_payloads(dia), len(linhas_dia), repeticoes, lambda: _apontar_read_ia(pasta, indice)
+    )
+
+    monitorias = [
+        {"titulo": e["summary"], "meet_id": extrair_meet_id(e) if i % 2 else None}
+        for i, e in enumerate(eventos[dia])
+    ]
+    amostra = monitorias[:MAX_CHAMADAS_UNITARIAS]
+    res["analisar_monitoria"] = _medir(
+        lambda: [read_ia.analisar_monitoria(m["titulo"], m["meet_id"], dia) for m in amostra],
+        len(amostra),
+        repeticoes,
+    )
+    res["analisar_monitorias_lote"] = _medir(
+        lambda: read_ia.analisar_monitorias(monitorias, dia, linhas_dia), len(monitorias), repeticoes
+    )
+    return res
+
+
+def bench_curso(n: int, repeticoes: int) -> dict:
+    rng = random.Random(7)
+    summaries = [geradores.summary(rng) for _ in range(n)]
+    return {
+        "inferir_cursos_do_summary": _medir(
+            lambda: [inferir_cursos_do_summary(s) for s in summaries], n, repeticoes
+        )
+    }
+
+
+def bench_agenda(n: int, eventos: dict[str, list[dict]], repeticoes: int) -> dict:
+    todos = [e for lista in eventos.values() for e in lista][:n]
+    return {
+        "extrair_dados": _medir(lambda: [extrair_dados(e["summary"]) for e in todos], len(todos), repeticoes),
+        "extrair_meet_id": _medir(lambda: [extrair_meet_id(e) for e in todos], len(todos), repeticoes),
+    }
+
+
+def rodar(escalas: list[int], repeticoes: int, transcript_kb: int, dias: int, manter: bool) -> dict:
+    resultado = {
+        "commit": _commit(),
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": {"repeticoes": repeticoes, "transcript_kb": transcript_kb, "dias": dias},
+        "escalas": {},
+    }
+
+    for n in escalas:
+        tmp = Path(tempfile.mkdtemp(prefix=f"bench_read_{n}_"))
+        try:
+            print(f"🧪 Gerando {n} payloads sintéticos em {tmp} ...")
+            t0 = time.perf_counter()
+            eventos = geradores.gerar_dataset(tmp / "read_payloads", n, dias, transcript_kb, fim=date.today())
+            print(f"   ok em {time.perf_counter() - t0:.1f}s")
+
+            res = {}
+            res.update(bench_read_ia(n, eventos, tmp / "read_payloads", repeticoes))
+            res.update(bench_curso(n, repeticoes))
+            res.update(bench_agenda(n, eventos, repeticoes))
+            resultado["escalas"][str(n)] = res
+
+            for nome, r in res.items():
+                print(f"   {nome:28s} {r['itens']:>7d} itens  {r['melhor_s']:9.4f}s  {r['us_por_item']:10.2f} µs/item")
+        finally:
+            _apontar_read_ia(read_ia.PASTA_READ, read_ia.INDICE_PATH)
+            if manter:
+                print(f"   dados mantidos em {tmp}")
+            else:
+                shutil.rmtree(tmp, ignore_errors=True)
+
+    return resultado
+
+
+def comparar(antes: Path, depois: Path) -> None:
+    a = json.loads(antes.read_text(encoding="utf-8"))
+    b = json.loads(depois.read_text(encoding="utf-8"))
+    print(f"📊 {a['commit']} ({a['gerado_em']}) → {b['commit']} ({b['gerado_em']})")
+    print(f"   {'escala':>7s}  {'benchmark':28s} {'antes µs':>11s} {'depois µs':>11s} {'razão':>7s}")
+    for escala, res_b in b["escalas"].items():
+        res_a = a["escalas"].get(escala, {})
+        for nome, rb in res_b.items():
+            ra = res_a.get(nome)
+            if not ra:
+                continue
+            razao = rb["us_por_item"] / ra["us_por_item"] if ra["us_por_item"] else float("inf")
+            marca = "⚠️" if razao > 1.10 else ("✅" if razao < 0.90 else "  ")
+            print(
+                f"   {escala:>7s}  {nome:28s} {ra['us_por_item']:11.2f} {rb['us_por_item']:11.2f} "
+                f"{razao:6.2f}x {marca}"
+            )
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Micro-benchmarks do relatório de monitorias")
+    ap.add_argument("--escalas", default="1000,10000", help="quantidades de payloads, separadas por vírgula")
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--transcript-kb", type=int, default=8, help="tamanho aproximado do transcript de cada payload")
+    ap.add_argument("--dias", type=int, default=30, help="em quantos dias os payloads são espalhados")
+    ap.add_argument("--saida", type=Path, help="arquivo JSON de saída (padrão: benchmarks/resultados/<data>_<commit>.json)")
+    ap.add_argument("--manter", action="store_true", help="não apaga os payloads gerados")
+    ap.add_argument("--comparar", nargs=2, type=Path, metavar=("ANTES", "DEPOIS"))
+    args = ap.parse_args(argv)
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+
+    escalas = [int(x) for x in args.escalas.split(",") if x.strip()]
+    resultado = rodar(escalas, args.repeticoes, args.transcript_kb, args.dias, args.manter)
+
+    saida = args.saida or PASTA_RESULTADOS / f"{datetime.now():%Y%m%d-%H%M%S}_{resultado['commit']}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultado, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"💾 Resultado salvo em {saida}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
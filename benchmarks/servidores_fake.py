@@ -0,0 +1,196 @@
+"""
+servidores_fake.py
+Servidores locais no lugar do Google, pra rodar o fluxo inteiro sem rede:
+- Calendar: GET /calendar/v3/calendars/<id>/events (paginação por pageToken, syncToken, 410)
+- Forms:   POST /forms/d/e/<id>/formResponse com os mesmos entry.* do forms_http,
+           com latência, 429 e erro 500 configuráveis
+
+Apontar o projeto pra eles:
+  AGENDA_API_URL=http://127.0.0.1:5202/calendar/v3/
+  FORMS_BASE_URL=http://127.0.0.1:5201
+
+Uso avulso:
+  python -m benchmarks.servidores_fake calendar --eventos eventos.json --porta 5202
+  python -m benchmarks.servidores_fake forms --porta 5201 --latencia-ms 80 --p429 0.05 --perro 0.01
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from benchmarks import SRC  # noqa: F401  (garante src/ no sys.path)
+
+
+def _inicio(evento: dict) -> datetime:
+    return datetime.fromisoformat(evento["start"]["dateTime"].replace("Z", "+00:00"))
+
+
+def app_calendar(eventos: list[dict], pagina: int = 250, latencia: float = 0.0) -> Flask:
+    """
+    events.list sobre uma lista fixa de eventos. `pagina` limita o maxResults
+    (o Google devolve no máximo 2500; menor que isso força a paginação).
+    O syncToken devolvido no fim só volta a lista de alterações (vazia).
+    """
+    app = Flask("calendar_fake")
+    ordenados = sorted(eventos, key=_inicio)
+    stats = {"requisicoes": 0, "paginas": 0, "eventos": 0}
+    lock = threading.Lock()
+
+    @app.get("/calendar/v3/calendars/<path:calendar_id>/events")
+    def listar(calendar_id):
+        if latencia:
+            time.sleep(latencia)
+        with lock:
+            stats["requisicoes"] += 1
+
+        sync = request.args.get("syncToken")
+        if sync is not None:
+            if sync != f"sync-{calendar_id}":
+                return jsonify({"error": {"code": 410, "message": "Sync token is no longer valid"}}), 410
+            return jsonify({"items": [], "nextSyncToken": sync})
+
+        itens = ordenados
+        if request.args.get("timeMin"):
+            t_min = datetime.fromisoformat(request.args["timeMin"].replace("Z", "+00:00"))
+            itens = [e for e in itens if _inicio(e) >= t_min]
+
+        tamanho = min(int(request.args.get("maxResults", 250)), pagina)
+        ini = int(request.args.get("pageToken") or 0)
+        resp = {"items": itens[ini:ini + tamanho]}
+        if ini + tamanho < len(itens):
+            resp["nextPageToken"] = str(ini + tamanho)
+        else:
+            resp["nextSyncToken"] = f"sync-{calendar_id}"
+
+        with lock:
+            stats["paginas"] += 1
+            stats["eventos"] += len(resp["items"])
+        return jsonify(resp)
+
+    @app.get("/_stats")
+    def ver_stats():
+        with lock:
+            return jsonify(stats)
+
+    return app
+
+
+def app_forms(
+    latencia: float = 0.0,
+    jitter: float = 0.0,
+    p429: float = 0.0,
+    perro: float = 0.0,
+    retry_after: float | None = None,
+    semente: int | None = None,
+) -> Flask:
+    """
+    formResponse que aceita o que o forms_http monta:
+    - 400 se faltar algum entry.* obrigatório
+    - 429 com probabilidade p429 (Retry-After opcional), 500 com probabilidade perro
+    - latência fixa + jitter uniforme (segundos) antes de responder
+    """
+    # import aqui: o forms_http lê FORMS_BASE_URL ao ser importado,
+    # e o carga.py só define a variável depois de escolher as portas
+    import forms_http as f
+
+    obrigatorios = (
+        f.ENTRY_NOME, f.ENTRY_MATRICULA, f.ENTRY_DATA_YEAR, f.ENTRY_DATA_MONTH, f.ENTRY_DATA_DAY,
+        f.ENTRY_AGENTE, f.ENTRY_STATUS, f.ENTRY_RELATORIO, f.ENTRY_LINK,
+    )
+    app = Flask("forms_fake")
+    rng = random.Random(semente)
+    stats = {"recebidos": 0, "aceitos": 0, "429": 0, "500": 0, "400": 0}
+    lock = threading.Lock()
+
+    @app.post("/forms/d/e/<form_id>/formResponse")
+    def responder(form_id):
+        with lock:
+            stats["recebidos"] += 1
+            sorteio = rng.random()
+            atraso = latencia + rng.uniform(0, jitter)
+        if atraso:
+            time.sleep(atraso)
+
+        if any(c not in request.form for c in obrigatorios):
+            codigo = 400
+        elif sorteio < p429:
+            codigo = 429
+        elif sorteio < p429 + perro:
+            codigo = 500
+        else:
+            codigo = 200
+
+        with lock:
+            stats["aceitos" if codigo == 200 else str(codigo)] += 1
+        headers = {"Retry-After": str(retry_after)} if codigo == 429 and retry_after is not None else {}
+        return ("ok" if codigo == 200 else "erro"), codigo, headers
+
+    @app.get("/_stats")
+    def ver_stats():
+        with lock:
+            return jsonify(stats)
+
+    return app
+
+
+class _SemLog(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class Servidor:
+    """Sobe um app Flask numa thread (porta 0 = qualquer porta livre), sem log por requisição."""
+
+    def __init__(self, app: Flask, host: str = "127.0.0.1", porta: int = 0):
+        self._srv = make_server(host, porta, app, threaded=True, request_handler=_SemLog)
+        self.url = f"http://{host}:{self._srv.server_port}"
+        self._thread = threading.Thread(target=self._srv.serve_forever, daemon=True)
+
+    def __enter__(self) -> "Servidor":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._srv.shutdown()
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Servidores fake de Calendar e Forms")
+    sub = ap.add_subparsers(dest="qual", required=True)
+
+    cal = sub.add_parser("calendar")
+    cal.add_argument("--eventos", type=Path, required=True, help="JSON com a lista de eventos")
+    cal.add_argument("--pagina", type=int, default=250)
+    cal.add_argument("--porta", type=int, default=5202)
+    cal.add_argument("--latencia-ms", type=float, default=0.0)
+
+    frm = sub.add_parser("forms")
+    frm.add_argument("--porta", type=int, default=5201)
+    frm.add_argument("--latencia-ms", type=float, default=0.0)
+    frm.add_argument("--jitter-ms", type=float, default=0.0)
+    frm.add_argument("--p429", type=float, default=0.0)
+    frm.add_argument("--perro", type=float, default=0.0)
+    frm.add_argument("--retry-after", type=float)
+
+    args = ap.parse_args(argv)
+    if args.qual == "calendar":
+        eventos = json.loads(args.eventos.read_text(encoding="utf-8"))
+        app = app_calendar(eventos, args.pagina, args.latencia_ms / 1000)
+    else:
+        app = app_forms(args.latencia_ms / 1000, args.jitter_ms / 1000, args.p429, args.perro, args.retry_after)
+
+    print(f"🧪 {args.qual} fake em http://127.0.0.1:{args.porta}")
+    make_server("127.0.0.1", args.porta, app, threaded=True).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""
+src
+Os módulos daqui se importam pelo nome (from agenda import ...), pra rodar tanto com
+`cd src && python main.py` quanto com `python -m src.main` a partir da raiz do projeto.
+"""
+
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
@@ -2,50 +2,309 @@
 agenda.py
 Responsável por:
 - Conectar à Google Calendar API
+- Manter um cache local dos eventos (sincronização incremental com syncToken)
 - Listar eventos do dia
 - Extrair dados das monitorias (nome, matrícula, agente, meet_id)
 """
 
+from __future__ import annotations
+
 from pathlib import Path
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
+import json
+import os
 import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+# bibliotecas do Google só são importadas ao conectar (são a maior parte do tempo de import
+# do main, e o --dry-run / extrair_dados não precisam delas)
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 CREDENTIALS_PATH = BASE_DIR / "credentials" / "agenda.json"
+# token OAuth salvo depois do primeiro login (renovado sozinho pelo refresh_token)
+TOKEN_PATH = BASE_DIR / "credentials" / "agenda_token.json"
 
 SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
 
+# calendários lidos numa execução (um por monitor), ex.: AGENDA_CALENDARIOS=primary,douglas@...,pedro@...
+CALENDARIOS = [c.strip() for c in os.getenv("AGENDA_CALENDARIOS", "primary").split(",") if c.strip()]
+
+# endpoint alternativo da API (ex.: servidor fake do benchmarks/carga.py): sem OAuth, credencial anônima
+# ex.: AGENDA_API_URL=http://127.0.0.1:5202/calendar/v3/
+AGENDA_API_URL = os.getenv("AGENDA_API_URL") or None
+# True: sem token válido, falha na hora em vez de abrir o navegador e esperar o login.
+# Processos sem ninguém na frente (webhook com envio imediato, agendador) ligam sozinhos.
+HEADLESS = bool(os.getenv("AGENDA_HEADLESS"))
+
 MEET_RE = re.compile(r"https?://meet\.google\.com/([a-z]{3}-[a-z]{4}-[a-z]{3})", re.I)
 
-def conectar_agenda():
+_service = None
+_creds: Credentials | None = None
+_local = threading.local()
+
+
+def _salvar_token(creds: Credentials):
+    TOKEN_PATH.parent.mkdir(parents=True, exist_ok=True)
+    TOKEN_PATH.write_text(creds.to_json(), encoding="utf-8")
+    try:
+        os.chmod(TOKEN_PATH, 0o600)
+    except OSError:
+        pass
+
+
+def _credenciais() -> Credentials:
+    from google.auth.exceptions import RefreshError
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    creds = None
+    if TOKEN_PATH.exists():
+        creds = Credentials.from_authorized_user_file(str(TOKEN_PATH), SCOPES)
+
+    if creds and creds.valid:
+        return creds
+
+    # expirou: renova em silêncio com o refresh_token
+    if creds and creds.expired and creds.refresh_token:
+        try:
+            creds.refresh(Request())
+            _salvar_token(creds)
+            return creds
+        except RefreshError:
+            print("⚠️ Token do Google Calendar revogado/expirado, precisa logar de novo.")
+
+    # sem token válido: só aqui abre o navegador (nunca em execução agendada)
+    if HEADLESS or os.getenv("AGENDA_HEADLESS"):
+        raise RuntimeError(
+            f"Sem token válido em {TOKEN_PATH}. Rode o main uma vez no terminal (sem AGENDA_HEADLESS) para fazer o login."
+        )
     flow = InstalledAppFlow.from_client_secrets_file(
         CREDENTIALS_PATH, SCOPES
     )
     creds = flow.run_local_server(port=0)
-    service = build('calendar', 'v3', credentials=creds)
-    return service
+    _salvar_token(creds)
+    return creds
+
+
+def conectar_agenda(forcar: bool = False):
+    """
+    Devolve o service do Calendar, reaproveitado enquanto o processo estiver vivo
+    (forcar=True monta de novo).
+    """
+    global _service, _creds
+    if _service is None or forcar:
+        if AGENDA_API_URL:
+            from google.auth.credentials import AnonymousCredentials
+
+            _creds = AnonymousCredentials()
+        else:
+            _creds = _credenciais()
+        _service = _montar_service(_creds)
+    return _service
+
+
+def _montar_service(creds):
+    from googleapiclient.discovery import build
+
+    opcoes = {"api_endpoint": AGENDA_API_URL} if AGENDA_API_URL else None
+    return build('calendar', 'v3', credentials=creds, cache_discovery=False, client_options=opcoes)
+
+
+def _service_da_thread(service):
+    # o service (httplib2) não é thread-safe: cada thread monta o seu com as mesmas credenciais
+    if _creds is None:
+        return service
+    if getattr(_local, "service", None) is None:
+        _local.service = _montar_service(_creds)
+    return _local.service
 
 TZ = ZoneInfo("America/Sao_Paulo")
 
-def eventos_do_dia(service):
-    # 🔧 TESTE: buscar monitorias de ONTEM
-    agora = datetime.now(TZ)
-    inicio = agora.replace(hour=0, minute=0, second=0, microsecond=0)
-    fim = inicio + timedelta(days=1)
+# ✅ cache local dos eventos: a 1ª execução baixa tudo a partir de DIAS_HISTORICO atrás,
+# as próximas só o que mudou/cancelou desde a última (syncToken)
+CACHE_PATH = BASE_DIR / "data" / "agenda_cache.sqlite"
+DIAS_HISTORICO = 7
+
+# partial response: só o que monitorias_do_dia usa (+ id/status pra sincronizar)
+FIELDS = (
+    "nextPageToken,nextSyncToken,"
+    "items(id,status,summary,start,hangoutLink,conferenceData/entryPoints/uri,description)"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS eventos (
+    calendar_id TEXT NOT NULL,
+    id          TEXT NOT NULL,
+    inicio_utc  TEXT NOT NULL,
+    evento      TEXT NOT NULL,
+    PRIMARY KEY (calendar_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_eventos_inicio ON eventos (calendar_id, inicio_utc);
+CREATE TABLE IF NOT EXISTS sync (
+    calendar_id TEXT PRIMARY KEY,
+    sync_token  TEXT,
+    time_min    TEXT NOT NULL
+);
+"""
+
+_con: sqlite3.Connection | None = None
+_lock_cache = threading.Lock()
+
+
+def _conexao() -> sqlite3.Connection:
+    global _con
+    if _con is None:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _con = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        _con.executescript(_SCHEMA)
+    return _con
 
-    eventos = service.events().list(
-        calendarId="primary",
-        timeMin=inicio.isoformat(),  # ✅ com -03:00 embutido
-        timeMax=fim.isoformat(),     # ✅ com -03:00 embutido
-        singleEvents=True,
-        orderBy="startTime",
-    ).execute()
 
-    return eventos.get("items", [])
+def _inicio_utc(evento: dict) -> str:
+    start = evento.get("start") or {}
+    if start.get("dateTime"):
+        dt = datetime.fromisoformat(start["dateTime"].replace("Z", "+00:00"))
+    else:
+        # evento de dia inteiro: conta a partir da meia-noite local
+        dt = datetime.fromisoformat(start.get("date") or "1970-01-01").replace(tzinfo=TZ)
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def _inicio_do_dia(dia: date) -> datetime:
+    return datetime(dia.year, dia.month, dia.day, tzinfo=TZ)
+
+
+def sincronizar_agenda(service, calendar_id: str = "primary", desde: date | None = None) -> int:
+    """
+    Atualiza o cache local do calendário, página por página (pageToken) até o fim.
+    Com syncToken salvo, só vêm eventos alterados/cancelados; sem ele (ou se o Google
+    invalidar o token, HTTP 410), refaz a carga completa a partir de DIAS_HISTORICO atrás.
+    `desde`: garante que o cache cobre a partir dessa data (backfill); se o cache começa
+    depois, refaz a carga completa a partir dela (uma consulta paginada só).
+    Retorna quantos eventos vieram.
+    """
+    from googleapiclient.errors import HttpError
+
+    con = _conexao()
+    with _lock_cache:
+        linha = con.execute(
+            "SELECT sync_token, time_min FROM sync WHERE calendar_id = ?", (calendar_id,)
+        ).fetchone()
+
+    inicio_padrao = _inicio_do_dia(datetime.now(TZ).date()) - timedelta(days=DIAS_HISTORICO)
+    if desde:
+        inicio_padrao = min(inicio_padrao, _inicio_do_dia(desde))
+
+    if linha and linha[0] and datetime.fromisoformat(linha[1]) <= inicio_padrao:
+        params = {"syncToken": linha[0]}
+        time_min = linha[1]
+    else:
+        time_min = inicio_padrao.isoformat()
+        params = {"timeMin": time_min}
+        # o syncToken sai junto com os eventos: se a carga parar no meio (rede, cota), a próxima
+        # execução refaz a carga completa em vez de seguir incremental sobre um cache pela metade
+        with _lock_cache, con:
+            con.execute("DELETE FROM eventos WHERE calendar_id = ?", (calendar_id,))
+            con.execute("DELETE FROM sync WHERE calendar_id = ?", (calendar_id,))
+
+    recebidos = 0
+    page_token = None
+    while True:
+        try:
+            resp = service.events().list(
+                calendarId=calendar_id,
+                singleEvents=True,
+                maxResults=2500,
+                pageToken=page_token,
+                fields=FIELDS,
+                **params,
+            ).execute()
+        except HttpError as e:
+            if e.resp.status == 410 and "syncToken" in params:
+                # token expirou do lado do Google: carga completa de novo
+                with _lock_cache, con:
+                    con.execute("DELETE FROM sync WHERE calendar_id = ?", (calendar_id,))
+                return sincronizar_agenda(service, calendar_id, desde)
+            raise
+
+        items = resp.get("items", [])
+        recebidos += len(items)
+        with _lock_cache, con:
+            for ev in items:
+                if ev.get("status") == "cancelled":
+                    con.execute("DELETE FROM eventos WHERE calendar_id = ? AND id = ?", (calendar_id, ev["id"]))
+                else:
+                    con.execute(
+                        "INSERT OR REPLACE INTO eventos (calendar_id, id, inicio_utc, evento) VALUES (?, ?, ?, ?)",
+                        (calendar_id, ev["id"], _inicio_utc(ev), json.dumps(ev, ensure_ascii=False)),
+                    )
+
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            break
+
+    with _lock_cache, con:
+        con.execute(
+            "INSERT OR REPLACE INTO sync (calendar_id, sync_token, time_min) VALUES (?, ?, ?)",
+            (calendar_id, resp.get("nextSyncToken"), time_min),
+        )
+    return recebidos
+
+
+def sincronizar_calendarios(
+    service,
+    calendarios: list[str] | None = None,
+    desde: date | None = None,
+) -> int:
+    """Sincroniza vários calendários ao mesmo tempo (uma thread por calendário)."""
+    calendarios = calendarios or CALENDARIOS
+    if len(calendarios) == 1 or _creds is None:
+        return sum(sincronizar_agenda(service, c, desde) for c in calendarios)
+
+    with ThreadPoolExecutor(max_workers=len(calendarios)) as ex:
+        return sum(ex.map(lambda c: sincronizar_agenda(_service_da_thread(service), c, desde), calendarios))
+
+
+def eventos_periodo(service, inicio: date, fim: date, calendarios: list[str] | None = None):
+    """Eventos de `inicio` a `fim` (inclusivo, dias em SP), sincronizando antes e lendo do cache local."""
+    calendarios = calendarios or CALENDARIOS
+    sincronizar_calendarios(service, calendarios, desde=inicio)
+
+    t_ini = _inicio_do_dia(inicio)
+    t_fim = _inicio_do_dia(fim) + timedelta(days=1)
+
+    with _lock_cache:
+        linhas = _conexao().execute(
+            f"SELECT id, evento FROM eventos WHERE calendar_id IN ({', '.join('?' * len(calendarios))}) "
+            "AND inicio_utc >= ? AND inicio_utc < ? ORDER BY inicio_utc",
+            (*calendarios, t_ini.astimezone(timezone.utc).isoformat(), t_fim.astimezone(timezone.utc).isoformat()),
+        ).fetchall()
+
+    # o mesmo evento pode estar em mais de um calendário (aluno + monitor convidados):
+    # fica um só por id do evento (o id de cada ocorrência de uma recorrência é o mesmo em
+    # todos os calendários). Nunca pelo meet_id: as ocorrências de uma série e os alunos
+    # que o monitor atende na mesma sala do Meet compartilham o link
+    eventos = []
+    vistos = set()
+    for ev_id, bruto in linhas:
+        if ev_id in vistos:
+            continue
+        vistos.add(ev_id)
+        eventos.append(json.loads(bruto))
+    return eventos
+
+
+def eventos_do_dia(service, dia: date | None = None, calendarios: list[str] | None = None):
+    # sincroniza (incremental) e lê o dia (00:00–24:00 em SP) do cache local
+    dia = dia or datetime.now(TZ).date()
+    return eventos_periodo(service, dia, dia, calendarios)
 
 def extrair_dados(summary: str):
     s = (summary or "").strip()
@@ -88,22 +347,30 @@ def extrair_meet_id(evento: dict) -> str | None:
 
     return None
 
-def monitorias_do_dia(service):
-    eventos = eventos_do_dia(service)
-    monitorias = []
-
-    for evento in eventos:
-        nome, matricula, agente = extrair_dados(evento['summary'])
-        data = evento['start']['dateTime'][:10]
-        meet_id = extrair_meet_id(evento)
-        monitorias.append({
-            "nome": nome,
-            "matricula": matricula,
-            "agente": agente,
-            "data": data,
-            "meet_id": meet_id,
-            "titulo": evento.get("summary", "")
-        })
-
-    return monitorias
+def _monitoria(evento: dict) -> dict:
+    nome, matricula, agente = extrair_dados(evento['summary'])
+    data = evento['start']['dateTime'][:10]
+    meet_id = extrair_meet_id(evento)
+    return {
+        "nome": nome,
+        "matricula": matricula,
+        "agente": agente,
+        "data": data,
+        "meet_id": meet_id,
+        "titulo": evento.get("summary", ""),
+        "fim": (evento.get("end") or {}).get("dateTime"),
+    }
+
+def monitorias_dos_eventos(eventos: list[dict]):
+    # eventos no formato do events.list (JSON salvo no --dry-run ou o cache local);
+    # ignora cancelados e os sem horário (dia inteiro: feriado, férias...)
+    return [
+        _monitoria(evento) for evento in eventos
+        if evento.get("status") != "cancelled" and (evento.get("start") or {}).get("dateTime")
+    ]
+
+def monitorias_do_dia(service, dia: date | None = None, calendarios: list[str] | None = None):
+    return monitorias_dos_eventos(eventos_do_dia(service, dia, calendarios))
 
+def monitorias_do_periodo(service, inicio: date, fim: date, calendarios: list[str] | None = None):
+    return monitorias_dos_eventos(eventos_periodo(service, inicio, fim, calendarios))
@@ -0,0 +1,225 @@
+"""
+agendador.py
+Roda o fluxo do main num processo só, de tempos em tempos, sem pagar a cada vez
+o start do Python, o build do service do Calendar, o OAuth e o índice do Read IA frio:
+o service, a Session do Forms e as conexões dos caches (índice, agenda, cursos,
+registro de envios) ficam vivos entre os ciclos.
+
+- a cada --intervalo minutos: ciclo parcial do dia (só quem já tem payload do Read IA)
+- no --fim-do-dia (hora de SP): ciclo completo do dia (aí sim as faltas vão pro Forms)
+- o dia só conta como fechado quando o ciclo completo deu certo (sem erro nem envio falho)
+  e nenhuma monitoria ficou em andamento; senão repete a cada RETENTATIVA_COMPLETO, inclusive depois da meia-noite
+  (e, se o agendador ficou parado, fecha os dias que faltaram, um por vez)
+
+Uso:
+  python agendador.py                                   # a cada 30 min + completo às 23:30
+  python agendador.py --intervalo 15 --fim-do-dia 22:00 --porta-status 8090
+  curl localhost:8090/status                             # último ciclo, durações, próximo ciclo
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import threading
+import time
+import traceback
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import agenda
+import main as principal
+from metricas import etapa, resumo, salvar_json, salvar_prometheus, zerar
+from read_ia import esquecer_sincronizacao
+
+TZ = ZoneInfo("America/Sao_Paulo")
+STATUS_JSON = principal.BASE_DIR / "data" / "agendador_status.json"
+RETENTATIVA_COMPLETO = timedelta(minutes=5)
+
+_parar = threading.Event()
+_lock_status = threading.Lock()
+_status: dict = {
+    "pid": os.getpid(),
+    "iniciado_em": None,
+    "ciclos": 0,
+    "falhas": 0,
+    "ultimo_ciclo": None,
+    "ultimo_completo": None,
+    "fechado_ate": None,  # último dia com ciclo completo sem erro e sem monitoria em andamento
+    "proximo_ciclo": None,
+}
+
+
+def status() -> dict:
+    with _lock_status:
+        return json.loads(json.dumps(_status))
+
+
+def _hora(s: str) -> tuple[int, int]:
+    try:
+        h, m = s.split(":")
+        return int(h), int(m)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Hora inválida (use HH:MM): {s}")
+
+
+def ciclo(dia: date, completo: bool, metricas_json: Path, metricas_prom: Path | None) -> dict:
+    """Um ciclo do main para `dia`; devolve o resumo (status, duração, etapas, contadores)."""
+    zerar()
+    # índice do Read IA: reconfere a partição do dia (mtime/tamanho), o resto continua em memória/SQLite
+    esquecer_sincronizacao()
+
+    inicio = datetime.now(TZ)
+    erro = None
+    t0 = time.perf_counter()
+    try:
+        with etapa("total"):
+            principal.executar(dia, dia, so_presentes=not completo)
+    except Exception as e:
+        erro = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+    duracao = time.perf_counter() - t0
+
+    dados = resumo()
+    salvar_json(metricas_json, dados)
+    if metricas_prom:
+        salvar_prometheus(metricas_prom, dados)
+
+    resultado = {
+        "dia": dia.isoformat(),
+        "completo": completo,
+        "inicio": inicio.isoformat(timespec="seconds"),
+        "duracao_s": round(duracao, 3),
+        "ok": erro is None,
+        "erro": erro,
+        "etapas": {nome: e["total_s"] for nome, e in dados["etapas"].items()},
+        "contadores": dados["contadores"],
+    }
+    with _lock_status:
+        _status["ciclos"] += 1
+        _status["falhas"] += erro is not None
+        _status["ultimo_ciclo"] = resultado
+        if completo:
+            _status["ultimo_completo"] = resultado
+    print(f"{'✅' if erro is None else '❌'} Ciclo {'completo' if completo else 'parcial'} de {dia} "
+          f"em {duracao:.2f}s" + (f" ({erro})" if erro else ""))
+    return resultado
+
+
+def _servir_status(porta: int) -> ThreadingHTTPServer:
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/status", "/health"):
+                self.send_error(404)
+                return
+            corpo = json.dumps(status(), ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", porta), _Handler)
+    threading.Thread(target=srv.serve_forever, name="agendador-status", daemon=True).start()
+    return srv
+
+
+def _fechado_ate_salvo() -> date | None:
+    # retoma de onde parou (o status.json fica entre reinícios)
+    try:
+        salvo = json.loads(STATUS_JSON.read_text(encoding="utf-8")).get("fechado_ate")
+        return date.fromisoformat(salvo) if salvo else None
+    except (OSError, ValueError):
+        return None
+
+
+def _fechou(resultado: dict) -> bool:
+    contadores = resultado["contadores"]
+    return (
+        resultado["ok"]
+        and not contadores.get("forms_falhas")
+        and not contadores.get("monitorias_em_andamento")
+    )
+
+
+def rodar(intervalo_min: float, fim_do_dia: tuple[int, int], metricas_json: Path, metricas_prom: Path | None):
+    # sem ninguém pra fazer login: token inválido vira erro do ciclo (no /status), não um navegador esperando
+    agenda.HEADLESS = True
+    intervalo = timedelta(minutes=intervalo_min)
+    agora = datetime.now(TZ)
+    # primeira vez: não volta no passado; de ontem pra trás é com o main (--from/--to)
+    fechado_ate = _fechado_ate_salvo() or agora.date() - timedelta(days=1)
+    with _lock_status:
+        _status["iniciado_em"] = agora.isoformat(timespec="seconds")
+        _status["fechado_ate"] = fechado_ate.isoformat()
+
+    proximo = agora
+    proximo_completo = agora
+
+    while not _parar.is_set():
+        agora = datetime.now(TZ)
+        hoje = agora.date()
+        hora_completo = agora.replace(hour=fim_do_dia[0], minute=fim_do_dia[1], second=0, microsecond=0)
+        # último dia que já devia estar fechado: hoje depois do --fim-do-dia, senão ontem
+        devido = hoje if agora >= hora_completo else hoje - timedelta(days=1)
+        a_fechar = fechado_ate + timedelta(days=1) if fechado_ate < devido else None
+
+        if a_fechar and agora >= proximo_completo:
+            if _fechou(ciclo(a_fechar, True, metricas_json, metricas_prom)):
+                fechado_ate = a_fechar
+                with _lock_status:
+                    _status["fechado_ate"] = fechado_ate.isoformat()
+            else:
+                # erro/envio falho (Calendar ou Forms fora) ou monitoria em andamento: tenta de novo daqui a pouco
+                proximo_completo = datetime.now(TZ) + RETENTATIVA_COMPLETO
+            continue
+        if agora >= proximo:
+            ciclo(hoje, False, metricas_json, metricas_prom)
+            proximo = datetime.now(TZ) + intervalo
+
+        if a_fechar:
+            alvo = min(proximo, proximo_completo)
+        elif fechado_ate < hoje:
+            alvo = min(proximo, hora_completo)
+        else:
+            alvo = proximo
+        with _lock_status:
+            _status["proximo_ciclo"] = alvo.isoformat(timespec="seconds")
+        salvar_json(STATUS_JSON, status())
+        # acorda no próximo ciclo (ou antes, se pedirem pra parar); no máx. 1 min por vez,
+        # pra não perder a virada do dia
+        _parar.wait(max(1.0, min(60.0, (alvo - datetime.now(TZ)).total_seconds())))
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Roda a automação de monitorias em intervalos, num processo só.")
+    parser.add_argument("--intervalo", type=float, default=30, help="minutos entre ciclos parciais")
+    parser.add_argument("--fim-do-dia", type=_hora, default=(23, 30), help="HH:MM (SP) do ciclo completo do dia")
+    parser.add_argument("--porta-status", type=int, help="serve o status em http://127.0.0.1:PORTA/status")
+    parser.add_argument("--metricas-json", type=Path, default=principal.METRICAS_JSON)
+    parser.add_argument("--metricas-prom", type=Path, default=os.getenv("METRICAS_PROM") or None)
+    args = parser.parse_args(argv)
+
+    # SIGTERM (systemd/docker): termina o ciclo em andamento e sai
+    signal.signal(signal.SIGTERM, lambda *_: _parar.set())
+    if args.porta_status:
+        _servir_status(args.porta_status)
+        print(f"🩺 Status em http://127.0.0.1:{args.porta_status}/status")
+
+    print(f"⏰ Agendador: a cada {args.intervalo:g} min, completo às {args.fim_do_dia[0]:02d}:{args.fim_do_dia[1]:02d}")
+    try:
+        rodar(args.intervalo, args.fim_do_dia, args.metricas_json, args.metricas_prom)
+    except KeyboardInterrupt:
+        pass
+    print("👋 Agendador encerrado.")
+
+
+if __name__ == "__main__":
+    main()
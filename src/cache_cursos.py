@@ -0,0 +1,103 @@
+"""
+cache_cursos.py
+Cache persistente (SQLite em data/) do inferir_cursos_do_summary.
+
+- chave = hash do texto do summary + impressão digital das tabelas de regras do curso.py
+  (CURSOS, ALIAS, STOPWORDS, CONCLUSAO_PATTERNS, FUTURO_PATTERNS, JANELA e limiares do fuzzy)
+- mexeu nas regras? a impressão muda e as entradas antigas são descartadas sozinhas
+- tamanho limitado (MAX_ENTRADAS), saindo primeiro as usadas há mais tempo (LRU)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import curso
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CACHE_PATH = BASE_DIR / "data" / "cursos_cache.sqlite"
+MAX_ENTRADAS = int(os.getenv("CURSOS_CACHE_MAX", "50000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    chave     TEXT PRIMARY KEY,
+    impressao TEXT NOT NULL,
+    cursos    TEXT NOT NULL,
+    usado_em  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_usado ON cache (usado_em);
+"""
+
+_con: sqlite3.Connection | None = None
+_lock = threading.Lock()
+
+
+def impressao_regras() -> str:
+    """Hash das tabelas de regras que mudam o resultado da inferência."""
+    regras = {
+        "cursos": curso.CURSOS,
+        "alias": sorted(curso.ALIAS.items()),
+        "stopwords": sorted(curso.STOPWORDS),
+        "conclusao": curso.CONCLUSAO_PATTERNS,
+        "futuro": curso.FUTURO_PATTERNS,
+        "janela": curso.JANELA,
+        "limiar_fuzzy": curso.LIMIAR_FUZZY,
+        "fuzzy_min_chars": curso.FUZZY_MIN_CHARS,
+    }
+    bruto = json.dumps(regras, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(bruto.encode("utf-8")).hexdigest()[:16]
+
+
+IMPRESSAO = impressao_regras()
+
+
+def _conexao() -> sqlite3.Connection:
+    global _con
+    if _con is None:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _con = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        _con.executescript(_SCHEMA)
+        # regras mudaram desde a última execução: nada do que está lá vale mais
+        with _con:
+            _con.execute("DELETE FROM cache WHERE impressao != ?", (IMPRESSAO,))
+    return _con
+
+
+def _chave(summary: str) -> str:
+    return IMPRESSAO + ":" + hashlib.sha256((summary or "").encode("utf-8")).hexdigest()
+
+
+def inferir_cursos_com_cache(summary: str) -> list[str]:
+    """Mesmo resultado do curso.inferir_cursos_do_summary, mas só calcula summaries novos."""
+    chave = _chave(summary)
+
+    with _lock:
+        con = _conexao()
+        linha = con.execute("SELECT cursos FROM cache WHERE chave = ?", (chave,)).fetchone()
+        if linha:
+            with con:
+                con.execute("UPDATE cache SET usado_em = ? WHERE chave = ?", (time.time(), chave))
+            return json.loads(linha[0])
+
+    cursos = curso.inferir_cursos_do_summary(summary)
+
+    with _lock:
+        con = _conexao()
+        with con:
+            con.execute(
+                "INSERT OR REPLACE INTO cache (chave, impressao, cursos, usado_em) VALUES (?, ?, ?, ?)",
+                (chave, IMPRESSAO, json.dumps(cursos, ensure_ascii=False), time.time()),
+            )
+            excesso = con.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - MAX_ENTRADAS
+            if excesso > 0:
+                con.execute(
+                    "DELETE FROM cache WHERE chave IN (SELECT chave FROM cache ORDER BY usado_em LIMIT ?)",
+                    (excesso,),
+                )
+    return cursos
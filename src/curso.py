@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import os
 import re
 import unicodedata
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from difflib import SequenceMatcher
+from itertools import islice
+from typing import Iterable, Iterator
 
 CURSOS = [
     "Scratch",
@@ -146,30 +152,89 @@ FUTURO_PATTERNS = [
     r"\bprecisa (?:ver|fazer|assistir|consumir|iniciar|comecar|começar)\b",
 ]
 
+# janela de contexto (quantas frases depois do gatilho “contam”)
+JANELA = 2
+
 # Regex útil: "módulo 6 de python", "modulo 2 python"
 MOD_PY_RE = re.compile(r"\bmodul[oa]\s*(\d+)\s*(?:de\s*)?python\b", re.I)
 
+_NAO_ALFANUM_RE = re.compile(r"[^a-z0-9\s\-]")
+_ESPACOS_RE = re.compile(r"\s+")
+_TOKENS_RE = re.compile(r"[^\s\-]+")
+
 def _norm(s: str) -> str:
     s = s or ""
     s = unicodedata.normalize("NFKD", s)
     s = "".join(ch for ch in s if not unicodedata.combining(ch))
     s = s.lower()
-    s = re.sub(r"[^a-z0-9\s\-]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _NAO_ALFANUM_RE.sub(" ", s)
+    s = _ESPACOS_RE.sub(" ", s).strip()
     return s
 
 def _split_sentences(text: str) -> list[str]:
     parts = re.split(r"[.\n;:!?]+", text)
     return [p.strip() for p in parts if p.strip()]
 
-def _tem_padrao(text: str, patterns: list[str]) -> bool:
-    return any(re.search(p, text) for p in patterns)
+# gatilhos compilados uma vez num regex só: cada grupo nomeado é um lookahead opcional,
+# então um único match() no começo da frase já diz se tem conclusão e/ou futuro
+_GATILHOS_RE = re.compile(
+    r"(?:(?=.*?(?P<conc>" + "|".join(f"(?:{p})" for p in CONCLUSAO_PATTERNS) + ")))?"
+    r"(?:(?=.*?(?P<fut>" + "|".join(f"(?:{p})" for p in FUTURO_PATTERNS) + ")))?"
+)
+
+def _gatilhos(text: str) -> tuple[bool, bool]:
+    m = _GATILHOS_RE.match(text)
+    return m.group("conc") is not None, m.group("fut") is not None
+
+# stopwords numa alternância só (mais longas primeiro), compilada uma vez
+_STOPWORDS_RE = re.compile(
+    r"\b(?:"
+    + "|".join(re.escape(w) for w in sorted({_norm(w) for w in STOPWORDS}, key=len, reverse=True))
+    + r")\b"
+)
 
 def _limpar_stopwords(text: str) -> str:
-    t = " " + text + " "
-    for w in sorted(STOPWORDS, key=len, reverse=True):
-        t = re.sub(rf"\b{re.escape(_norm(w))}\b", " ", t)
-    return re.sub(r"\s+", " ", t).strip()
+    t = _STOPWORDS_RE.sub(" ", text)
+    return _ESPACOS_RE.sub(" ", t).strip()
+
+def _compilar_cursos() -> tuple[dict, int]:
+    """
+    Monta (uma vez, no import) uma trie por palavra com ALIAS + nomes de CURSOS já normalizados.
+    Palavras = pedaços entre espaço/hífen, então "rest" não casa dentro de "interesse"
+    nem "api" dentro de "rapido" (o teste antigo era substring).
+    """
+    trie: dict = {}
+    maior = 0
+    frases = [(_norm(apelido), curso) for apelido, curso in ALIAS.items()]
+    frases += [(_norm(curso), curso) for curso in CURSOS if curso != "Não consumiu"]
+    for frase, curso in frases:
+        tokens = _TOKENS_RE.findall(frase)
+        if not tokens:
+            continue
+        no = trie
+        for tok in tokens:
+            no = no.setdefault(tok, {})
+        no.setdefault(None, set()).add(curso)  # chave None = fim de frase -> cursos
+        maior = max(maior, len(tokens))
+    return trie, maior
+
+_TRIE_CURSOS, _MAX_TOKENS_CURSO = _compilar_cursos()
+
+def _curso_mod_python(m: re.Match) -> str:
+    mod = int(m.group(1))
+    # ajuste se você quiser outra regra; aqui: 1-6 => Python I, 7+ => Python II
+    return "Python I" if mod <= 6 else "Python II"
+
+def _achar_na_trie(tokens: list[str]):
+    """Para cada palavra, anda na trie e devolve (inicio, fim, cursos) de cada frase que casou."""
+    for i in range(len(tokens)):
+        no = _TRIE_CURSOS
+        for j in range(i, min(i + _MAX_TOKENS_CURSO, len(tokens))):
+            no = no.get(tokens[j])
+            if no is None:
+                break
+            if None in no:
+                yield i, j, no[None]
 
 def _extrair_cursos_no_texto(text_norm: str) -> set[str]:
     achados: set[str] = set()
@@ -177,42 +242,122 @@ def _extrair_cursos_no_texto(text_norm: str) -> set[str]:
     # 0) Heurística: módulo X de Python -> Python I/II
     m = MOD_PY_RE.search(text_norm)
     if m:
-        mod = int(m.group(1))
-        # ajuste se você quiser outra regra; aqui: 1-6 => Python I, 7+ => Python II
-        achados.add("Python I" if mod <= 6 else "Python II")
-
-    # 1) alias (frases curtas)
-    for apelido, curso in ALIAS.items():
-        if _norm(apelido) in text_norm:
-            achados.add(curso)
-
-    # 2) nome do curso direto (com normalização)
-    for curso in CURSOS:
-        if curso == "Não consumiu":
-            continue
-        c = _norm(curso)
-        if c and c in text_norm:
-            achados.add(curso)
+        achados.add(_curso_mod_python(m))
+
+    # 1) alias + 2) nome do curso direto: uma passada só pelas palavras do texto,
+    # andando na trie a partir de cada palavra (todas as frases que começam ali contam)
+    for _, _, cursos in _achar_na_trie(_TOKENS_RE.findall(text_norm)):
+        achados |= cursos
 
     return achados
 
-def _score(a: str, b: str) -> float:
-    return SequenceMatcher(None, a, b).ratio()
+def _mencoes(frases: list[str]) -> tuple[dict[int, list[tuple[int, str]]], list[tuple[int, int, str]]]:
+    """
+    Mesma busca do _extrair_cursos_no_texto, mas no summary inteiro (frases já limpas) de uma vez,
+    guardando em que frase cada menção começa e termina (uma menção pode atravessar frases,
+    como acontecia ao juntar a janela num texto só).
+    Retorna ({frase_inicio: [(frase_fim, curso)]}, [(frase_inicio, frase_fim, curso) do MOD_PY_RE]).
+    """
+    tokens: list[str] = []
+    frase_do_token: list[int] = []
+    inicios: list[int] = []  # posição (em caracteres) de cada frase no texto juntado
+    frase_do_inicio: list[int] = []
+    pos = 0
+    for k, f in enumerate(frases):
+        if not f:
+            continue
+        inicios.append(pos)
+        frase_do_inicio.append(k)
+        pos += len(f) + 1
+        for tok in _TOKENS_RE.findall(f):
+            tokens.append(tok)
+            frase_do_token.append(k)
+
+    por_inicio: dict[int, list[tuple[int, str]]] = {}
+    for i, j, cursos in _achar_na_trie(tokens):
+        for curso in cursos:
+            por_inicio.setdefault(frase_do_token[i], []).append((frase_do_token[j], curso))
+
+    def frase_na_posicao(p: int) -> int:
+        return frase_do_inicio[bisect_right(inicios, p) - 1]
+
+    mod_py = [
+        (frase_na_posicao(m.start()), frase_na_posicao(m.end() - 1), _curso_mod_python(m))
+        for m in MOD_PY_RE.finditer(" ".join(f for f in frases if f))
+    ]
+    return por_inicio, mod_py
+
+# fallback fuzzy: limiar do SequenceMatcher entre um trecho do texto e um nome/apelido
+LIMIAR_FUZZY = 0.85
+# apelidos curtos ("api", "poo", "sql", "css"...) só valem por match exato
+FUZZY_MIN_CHARS = 5
+
+def _trigramas(s: str) -> set[str]:
+    s = f" {s} "
+    return {s[i : i + 3] for i in range(len(s) - 2)}
+
+def _compilar_fuzzy() -> tuple[list[tuple[str, str, set[str]]], dict[int, dict[str, list[int]]]]:
+    """
+    Índice invertido de trigramas (no import) sobre nomes de CURSOS + ALIAS normalizados,
+    separado pelo número de palavras de cada nome: {n_palavras: {trigrama: [alvos]}}.
+    """
+    alvos: list[tuple[str, str, set[str]]] = []
+    vistos = set()
+    frases = [(_norm(curso), curso) for curso in CURSOS if curso != "Não consumiu"]
+    frases += [(_norm(apelido), curso) for apelido, curso in ALIAS.items()]
+    for frase, curso in frases:
+        if len(frase) < FUZZY_MIN_CHARS or frase in vistos:
+            continue
+        vistos.add(frase)
+        alvos.append((frase, curso, _trigramas(frase)))
+
+    indice: dict[int, dict[str, list[int]]] = {}
+    for idx, (frase, _, tris) in enumerate(alvos):
+        por_tri = indice.setdefault(len(frase.split(" ")), {})
+        for tri in tris:
+            por_tri.setdefault(tri, []).append(idx)
+    return alvos, indice
 
-def _fuzzy_um_curso(text_norm: str, limiar: float = 0.78) -> str | None:
+_ALVOS_FUZZY, _INDICE_TRIGRAMAS = _compilar_fuzzy()
+
+def _fuzzy_um_curso(text_norm: str, limiar: float | None = None) -> str | None:
     """
-    Fallback: tenta escolher 1 curso se o texto estiver "perto" de um nome.
+    Fallback: tenta escolher 1 curso se algum trecho do texto estiver "perto" de um nome/apelido
+    (ex.: "pyton ii" -> Python II).
+    Compara trechos com o mesmo número de palavras de cada nome, não o texto inteiro;
+    o índice de trigramas limita os candidatos e o SequenceMatcher só roda em strings curtas.
     Usa limiar alto pra evitar falso positivo.
     """
+    limiar = LIMIAR_FUZZY if limiar is None else limiar
+    palavras = text_norm.split(" ")
+
     best = None
     best_sc = 0.0
-    for curso in CURSOS:
-        if curso == "Não consumiu":
-            continue
-        sc = _score(text_norm, _norm(curso))
-        if sc > best_sc:
-            best_sc = sc
-            best = curso
+    for i in range(len(palavras)):
+        for n, por_tri in _INDICE_TRIGRAMAS.items():
+            if i + n > len(palavras):
+                continue
+            trecho = " ".join(palavras[i : i + n])
+            tris = _trigramas(trecho)
+
+            comuns: dict[int, int] = {}
+            for tri in tris:
+                for idx in por_tri.get(tri, ()):
+                    comuns[idx] = comuns.get(idx, 0) + 1
+
+            for idx, c in comuns.items():
+                frase, curso, tris_alvo = _ALVOS_FUZZY[idx]
+                # corte barato por trigramas (Dice) antes do SequenceMatcher
+                if 2 * c / (len(tris) + len(tris_alvo)) < 0.5:
+                    continue
+                sm = SequenceMatcher(None, trecho, frase)
+                if sm.real_quick_ratio() <= best_sc or sm.quick_ratio() <= best_sc:
+                    continue
+                sc = sm.ratio()
+                if sc > best_sc:
+                    best_sc = sc
+                    best = curso
+
     if best and best_sc >= limiar:
         return best
     return None
@@ -224,38 +369,44 @@ def inferir_cursos_do_summary(summary: str) -> list[str]:
     - e NÃO aparece apenas como meta futura
 
     Implementação:
-    - varre frases
+    - varre frases (normalizadas e sem stopwords uma vez só)
     - quando encontra gatilho de CONCLUSAO, abre uma janela (frase atual + próximas 2)
     - quando encontra gatilho de FUTURO, abre janela (frase atual + próximas 2) e bloqueia cursos dali
     - resultado final = (cursos_conclusao) - (cursos_apenas_futuro)
     """
     full = _norm(summary)
-    frases = _split_sentences(full)
+    frases = [_limpar_stopwords(f) for f in _split_sentences(full)]
 
     cursos_concluidos: set[str] = set()
     cursos_futuros: set[str] = set()
 
-    # janela de contexto (quantas frases depois “contam”)
-    JANELA = 2
-
-    for i, f in enumerate(frases):
-        f_clean = _limpar_stopwords(f)
+    # todas as menções de curso saem de uma passada só; cada janela só junta as que cabem nela
+    por_inicio, mod_py = _mencoes(frases)
 
-        is_conc = _tem_padrao(f_clean, CONCLUSAO_PATTERNS)
-        is_fut = _tem_padrao(f_clean, FUTURO_PATTERNS)
+    for i, f_clean in enumerate(frases):
+        is_conc, is_fut = _gatilhos(f_clean)
 
         if not (is_conc or is_fut):
             continue
 
-        # monta trecho da janela: frase atual + próximas JANELA
-        trecho = " ".join(frases[i : i + 1 + JANELA])
-        trecho = _limpar_stopwords(trecho)
-
-        achados = _extrair_cursos_no_texto(trecho)
+        # trecho da janela: frase atual + próximas JANELA
+        ultima = min(i + JANELA, len(frases) - 1)
+        achados: set[str] = set()
+        for k in range(i, ultima + 1):
+            for fim, curso in por_inicio.get(k, ()):
+                if fim <= ultima:
+                    achados.add(curso)
+
+        # "módulo X de python": vale a primeira menção que começa na janela (igual ao search)
+        for ini, fim, curso in mod_py:
+            if ini >= i:
+                if fim <= ultima:
+                    achados.add(curso)
+                break
 
         # fallback fuzzy só se não achou nada e tem palavras-chave (evita marcar à toa)
         if not achados:
-            possivel = _fuzzy_um_curso(trecho)
+            possivel = _fuzzy_um_curso(" ".join(f for f in frases[i : ultima + 1] if f))
             if possivel:
                 achados.add(possivel)
 
@@ -274,3 +425,49 @@ def inferir_cursos_do_summary(summary: str) -> list[str]:
     return sorted(cursos_final)
 
 
+def _inferir_bloco(summaries: list[str]) -> list[list[str]]:
+    return [inferir_cursos_do_summary(s) for s in summaries]
+
+def inferir_cursos_em_lote(
+    summaries: Iterable[str],
+    workers: int | None = None,
+    chunksize: int = 64,
+) -> Iterator[list[str]]:
+    """
+    inferir_cursos_do_summary para muitos summaries (reprocessamento de histórico),
+    espalhado num ProcessPoolExecutor.
+
+    - devolve um gerador, na mesma ordem da entrada
+    - lê a entrada aos poucos: só ~2 blocos de `chunksize` por worker ficam em voo,
+      então a memória não cresce com o tamanho do backfill
+    - cada worker importa este módulo uma vez, e é no import que trie, índice de trigramas
+      e regex são compilados (nada é recompilado por summary)
+    - workers=1 roda no processo atual, sem pool
+    """
+    if workers == 1:
+        for s in summaries:
+            yield inferir_cursos_do_summary(s)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    entrada = iter(summaries)
+    em_voo: deque = deque()
+
+    ex = ProcessPoolExecutor(max_workers=workers)
+    try:
+        def submeter() -> bool:
+            bloco = list(islice(entrada, chunksize))
+            if bloco:
+                em_voo.append(ex.submit(_inferir_bloco, bloco))
+            return bool(bloco)
+
+        for _ in range(workers * 2):
+            if not submeter():
+                break
+
+        while em_voo:
+            resultados = em_voo.popleft().result()
+            submeter()
+            yield from resultados
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,149 @@
+"""
+envio_imediato.py
+Modo por evento (opcional): o webhook_read entrega cada meeting_end assim que ele está
+gravado em disco, e uma thread daqui:
+- cruza o payload com as monitorias do dia (cache do agenda.monitorias_do_dia)
+- infere os cursos do resumo
+- envia o registro daquela sessão pro Forms e grava no registro_envios
+
+O main do fim do dia continua igual: pula o que já foi aceito e manda só o que sobrou
+(as faltas e o que falhou aqui). Ligar com:
+  python webhook_read.py --prod --envio-imediato      (ou READ_ENVIO_IMEDIATO=1)
+O processo do webhook precisa do token do Calendar (rode o main uma vez antes). Sem token válido
+não abre navegador: o erro vai pro status (ultimo_erro) e o registro fica pro main do fim do dia.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+FILA_MAX = int(os.getenv("READ_ENVIO_FILA_MAX", "1000"))
+# monitorias do dia em cache por esse tempo (a sincronização do agenda é incremental, recarregar é barato)
+AGENDA_TTL_S = float(os.getenv("READ_ENVIO_AGENDA_TTL", "600"))
+# payload que não casou com nada: recarrega a agenda (evento criado depois), no máximo a cada RECARGA_MIN_S
+RECARGA_MIN_S = 60
+
+_fila: queue.Queue = queue.Queue(maxsize=FILA_MAX)
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+_pid: int | None = None
+
+# só a thread do worker mexe aqui
+_monitorias: dict[str, tuple[float, list[dict]]] = {}
+
+_stats = {"recebidos": 0, "enviados": 0, "falhas": 0, "ja_aceitos": 0, "reservados": 0, "sem_monitoria": 0}
+_ultimo_erro = ""
+
+
+def enfileirar(arquivo: str | Path, payload: dict) -> None:
+    """Chamado pelo webhook_read depois que o payload meeting_end está gravado."""
+    _garantir_worker()
+    try:
+        _fila.put_nowait((str(arquivo), payload))
+    except queue.Full:
+        print(f"⚠️ Envio imediato: fila cheia, {arquivo} fica pro main do fim do dia")
+
+
+def status() -> dict:
+    return {**_stats, "fila": _fila.qsize(), "ultimo_erro": _ultimo_erro}
+
+
+def _monitorias_do_dia(dia: str, recarregar: bool = False) -> list[dict]:
+    import agenda
+    from agenda import conectar_agenda, monitorias_do_dia
+
+    # thread do servidor: login interativo travaria a fila até o FILA_MAX
+    agenda.HEADLESS = True
+
+    agora = time.monotonic()
+    cache = _monitorias.get(dia)
+    if cache:
+        idade = agora - cache[0]
+        if idade < (RECARGA_MIN_S if recarregar else AGENDA_TTL_S):
+            return cache[1]
+
+    lista = monitorias_do_dia(conectar_agenda(), date.fromisoformat(dia))
+    _monitorias[dia] = (agora, lista)
+    return lista
+
+
+def _casar(registro, dia: str, recarregar: bool = False) -> list[tuple[dict, dict]]:
+    from read_ia import analisar_monitorias
+
+    monitorias = _monitorias_do_dia(dia, recarregar)
+    reads, _ = analisar_monitorias(monitorias, dia, [registro])
+    return [(m, r) for m, r in zip(monitorias, reads) if r["payload"] is not None]
+
+
+def _processar(arquivo: str, payload: dict) -> None:
+    from forms_http import enviar_forms_lote
+    from main import montar_dados_forms, normalizar_agente
+    from read_ia import registro_do_payload
+    from registro_envios import chave_registro, hash_payload, ja_aceito, registrar, reservar
+
+    _stats["recebidos"] += 1
+    registro = registro_do_payload(arquivo, payload)
+    dia = registro.data_local
+    if not dia:
+        _stats["sem_monitoria"] += 1
+        return
+
+    casadas = _casar(registro, dia) or _casar(registro, dia, recarregar=True)
+    if not casadas:
+        _stats["sem_monitoria"] += 1
+        print(f"⚠️ Envio imediato: {registro.titulo or arquivo} sem monitoria na agenda de {dia}")
+        return
+
+    for m, read in casadas:
+        agente = normalizar_agente(m.get("agente"))
+        chave = chave_registro(m)
+        if ja_aceito(dia, chave, agente):
+            _stats["ja_aceitos"] += 1
+            continue
+
+        dados = montar_dados_forms(dia, m, read, agente)
+        # main/agendador podem estar mandando o mesmo registro agora: quem reservar primeiro envia
+        if not reservar(dia, chave, agente, hash_payload(dados)):
+            _stats["reservados"] += 1
+            continue
+        # lote de um: mesmas retentativas/freio do envio do fim do dia
+        r = enviar_forms_lote([dados], max_workers=1)[0]
+        registrar(dia, chave, agente, hash_payload(dados), r)
+        if r["ok"]:
+            _stats["enviados"] += 1
+            print(f"📤 Envio imediato: {m['nome']} ({dia}) ✅ {r['status_code']} em {r['duracao_s']:.2f}s")
+        else:
+            _stats["falhas"] += 1
+            print(f"❌ Envio imediato: {m['nome']} ({dia}) falhou ({r['status_code'] or r['erro']}), fica pro main")
+
+
+def _worker():
+    global _ultimo_erro
+    while True:
+        arquivo, payload = _fila.get()
+        try:
+            _processar(arquivo, payload)
+        except Exception as e:
+            # agenda fora do ar, token inválido...: o main do fim do dia cobre
+            _ultimo_erro = f"{type(e).__name__}: {e}"
+            print(f"❌ Envio imediato: erro em {arquivo}: {_ultimo_erro}")
+        finally:
+            _fila.task_done()
+
+
+def _garantir_worker():
+    # uma thread por processo (com gunicorn, cada worker tem a sua)
+    global _fila, _thread, _pid
+    with _lock:
+        if _pid == os.getpid() and _thread.is_alive():
+            return
+        if _pid is not None and _pid != os.getpid():
+            _fila = queue.Queue(maxsize=FILA_MAX)
+        _thread = threading.Thread(target=_worker, name="read-envio-imediato", daemon=True)
+        _thread.start()
+        _pid = os.getpid()
@@ -1,10 +1,20 @@
 from __future__ import annotations
 
+import os
+import random
 import re
-import requests
-from typing import Dict, List, Union
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
-FORM_VIEW_URL = "https://docs.google.com/forms/d/e/1FAIpQLScqJcE8_wd3NrCdaP36TyotY8b9LMk1mRI6ceAZ8symajfz7g/viewform"
+# requests só é importado no primeiro envio (montar_payload / --dry-run não precisam dele)
+if TYPE_CHECKING:
+    import requests
+
+# FORMS_BASE_URL troca o host (ex.: servidor fake do benchmarks/carga.py); o caminho do form é o mesmo
+FORMS_BASE_URL = (os.getenv("FORMS_BASE_URL") or "https://docs.google.com").rstrip("/")
+FORM_VIEW_URL = f"{FORMS_BASE_URL}/forms/d/e/1FAIpQLScqJcE8_wd3NrCdaP36TyotY8b9LMk1mRI6ceAZ8symajfz7g/viewform"
 
 # seus entry ids
 ENTRY_NOME = "entry.615656428"
@@ -46,12 +56,13 @@ def split_yyyy_mm_dd(data_yyyy_mm_dd: str):
     return m.group(1), m.group(2), m.group(3)
 
 
-def enviar_forms_http(dados: Dict[str, Union[str, List[str]]]) -> requests.Response:
+def montar_payload(dados: Dict[str, Union[str, List[str]]]):
     """
     dados esperados:
       nome, matricula, data (YYYY-MM-DD), agente, status, relatorio, link
       curso: str OU list[str] (checkbox)
       url: FORM_VIEW_URL (viewform)
+    Retorna (url_post, payload, headers).
     """
     url_view = str(dados.get("url") or FORM_VIEW_URL)
     url_post = view_to_form_response(url_view)
@@ -86,9 +97,180 @@ def enviar_forms_http(dados: Dict[str, Union[str, List[str]]]) -> requests.Respo
         "User-Agent": "Mozilla/5.0",
         "Referer": url_view,
     }
+    return url_post, payload, headers
+
+
+# uma Session só (com pool de conexões) pra todos os envios: reaproveita o TLS com o docs.google.com
+POOL_MAX = 16
+_sessao: Optional[requests.Session] = None
+_lock_sessao = threading.Lock()
+
+
+def sessao_http() -> requests.Session:
+    global _sessao
+    with _lock_sessao:
+        if _sessao is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            _sessao = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=POOL_MAX)
+            _sessao.mount("https://", adapter)
+            _sessao.mount("http://", adapter)
+        return _sessao
+
+
+def enviar_forms_http(
+    dados: Dict[str, Union[str, List[str]]],
+    sessao: Optional[requests.Session] = None,
+) -> requests.Response:
+    """Envia um registro para o Forms (ver montar_payload para os campos de `dados`)."""
+    url_post, payload, headers = montar_payload(dados)
 
     # não precisa cookies pra envio público (na maioria dos forms)
     # allow_redirects=False é ok, mas pode deixar True também
-    resp = requests.post(url_post, data=payload, headers=headers, timeout=30, allow_redirects=False)
+    sessao = sessao or sessao_http()
+    resp = sessao.post(url_post, data=payload, headers=headers, timeout=30, allow_redirects=False)
     return resp
 
+
+class _RitmoAdaptativo:
+    """
+    Intervalo mínimo entre envios, compartilhado pelas threads do lote:
+    - 429/5xx dobra o intervalo e pausa todo mundo (pelo Retry-After, se vier)
+    - cada sucesso vai reduzindo o intervalo até voltar a zero
+    """
+
+    def __init__(self, maximo: float = 30.0):
+        self.intervalo = 0.0
+        self.maximo = maximo
+        self._proximo = 0.0
+        self._lock = threading.Lock()
+
+    def aguardar(self):
+        with self._lock:
+            agora = time.monotonic()
+            espera = max(0.0, self._proximo - agora)
+            self._proximo = max(agora, self._proximo) + self.intervalo
+        if espera:
+            time.sleep(espera)
+
+    def sucesso(self):
+        with self._lock:
+            self.intervalo = self.intervalo * 0.7 if self.intervalo > 0.02 else 0.0
+
+    def freio(self, retry_after: Optional[float] = None):
+        with self._lock:
+            self.intervalo = min(self.maximo, max(self.intervalo * 2, 0.1))
+            self._proximo = max(self._proximo, time.monotonic() + (retry_after or self.intervalo))
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    try:
+        return float(resp.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+def _enviar_com_retry(dados, ritmo: _RitmoAdaptativo, tentativas: int) -> dict:
+    import requests
+
+    resultado = {"ok": False, "status_code": None, "erro": "", "tentativas": 0}
+    for n in range(1, tentativas + 1):
+        resultado["tentativas"] = n
+        ritmo.aguardar()
+        try:
+            resp = enviar_forms_http(dados)
+        except (ValueError, KeyError) as e:
+            # dado inválido (ex.: data fora do formato): não adianta tentar de novo
+            resultado["erro"] = str(e)
+            return resultado
+        except requests.RequestException as e:
+            resultado["status_code"], resultado["erro"] = None, str(e)
+            ritmo.freio()
+        else:
+            resultado["status_code"] = resp.status_code
+            if resp.ok:
+                resultado["ok"], resultado["erro"] = True, ""
+                ritmo.sucesso()
+                return resultado
+            resultado["erro"] = f"HTTP {resp.status_code}"
+            if resp.status_code != 429 and resp.status_code < 500:
+                return resultado
+            ritmo.freio(_retry_after(resp))
+
+        if n < tentativas:
+            # backoff exponencial com jitter, além do ritmo compartilhado
+            time.sleep(min(30.0, 0.5 * 2 ** (n - 1)) * random.uniform(0.5, 1.0))
+    return resultado
+
+
+def enviar_forms_lote(
+    registros: List[Dict[str, Union[str, List[str]]]],
+    max_workers: int = 8,
+    tentativas: int = 4,
+    ao_concluir: Optional[Callable[[int, dict], None]] = None,
+) -> List[dict]:
+    """
+    Envia vários registros em paralelo (ThreadPool + Session com pool de conexões).
+    Tenta de novo em 429/5xx/erro de rede, freando o ritmo de todo o lote.
+    Retorna um dict por registro, na mesma ordem:
+      {"ok": bool, "status_code": int | None, "erro": str, "tentativas": int, "duracao_s": float}
+    ao_concluir(indice, resultado) é chamado assim que cada registro termina
+    (ex.: gravar no registro_envios antes de o lote acabar).
+    """
+    if not registros:
+        return []
+
+    resultados: List[dict] = [{}] * len(registros)
+
+    def guardar(indice: int, resultado: dict):
+        resultados[indice] = resultado
+        if ao_concluir:
+            ao_concluir(indice, resultado)
+
+    enviar_forms_fluxo(enumerate(registros), min(max_workers, len(registros)), tentativas, guardar)
+    return resultados
+
+
+def enviar_forms_fluxo(
+    registros: Iterable[Tuple[Any, Dict[str, Union[str, List[str]]]]],
+    max_workers: int = 8,
+    tentativas: int = 4,
+    ao_concluir: Optional[Callable[[Any, dict], None]] = None,
+) -> None:
+    """
+    Como o enviar_forms_lote, mas consome pares (id, dados) de um iterável conforme eles
+    chegam (ex.: gerador alimentado por outra etapa do pipeline do main), sem esperar a lista toda.
+    ao_concluir(id, resultado) é chamado a cada registro terminado (na ordem em que terminam).
+    Se o ao_concluir levantar exceção, o trabalhador segue com os próximos (o iterável é sempre
+    consumido até o fim) e a primeira exceção é relançada depois que todos terminarem.
+    """
+    ritmo = _RitmoAdaptativo()
+    proximo = iter(registros)
+    lock = threading.Lock()
+    erros: List[Exception] = []
+
+    def trabalhador():
+        while True:
+            with lock:
+                try:
+                    ident, dados = next(proximo)
+                except StopIteration:
+                    return
+            t0 = time.perf_counter()
+            resultado = _enviar_com_retry(dados, ritmo, tentativas)
+            resultado["duracao_s"] = time.perf_counter() - t0
+            if ao_concluir:
+                try:
+                    ao_concluir(ident, resultado)
+                except Exception as e:
+                    with lock:
+                        erros.append(e)
+
+    n = max(1, min(max_workers, POOL_MAX))
+    with ThreadPoolExecutor(max_workers=n) as ex:
+        for f in [ex.submit(trabalhador) for _ in range(n)]:
+            f.result()
+    if erros:
+        raise erros[0]
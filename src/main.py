@@ -6,17 +6,46 @@ Fluxo:
 - Lê monitorias do dia no Google Calendar
 - Cruza com payloads do Read IA
 - Envia registros para Google Forms via HTTP
+
+Uso:
+  python -m src.main                                     # hoje
+  python -m src.main --from 2026-02-02 --to 2026-02-08   # backfill de um intervalo
+  python -m src.main --profile                           # + cProfile em data/profile_*.pstats
+  python -m src.main --metricas-prom /var/lib/node_exporter/textfile/monitorias.prom
+  python -m src.main --dry-run eventos.json              # sem Google: só mostra o que iria pro Forms
+  python -m src.main --debug-read                        # + contagem de payloads por data no índice
 """
 
-from datetime import date
-from agenda import conectar_agenda, monitorias_do_dia
-from read_ia import analisar_monitoria
-from forms_http import enviar_forms_http
-from curso import inferir_cursos_do_summary
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from agenda import conectar_agenda, monitorias_do_periodo, monitorias_dos_eventos
+from read_ia import PayloadRead, carregar_payloads_periodo, casar_monitorias, ler_resultado
+from forms_http import enviar_forms_fluxo, montar_payload
+from cache_cursos import inferir_cursos_com_cache
+from registro_envios import chave_registro, hash_payload, ja_aceito, registrar, reservar
 from read_ia import debug_read_datas
-from read_ia import PASTA_READ
-print("📂 Pasta Read IA:", PASTA_READ)
+from metricas import etapa, registrar as registrar_tempo, resumo, salvar_json, salvar_prometheus, somar, zerar
+import read_ia
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+METRICAS_JSON = BASE_DIR / "data" / "metricas_ultima_execucao.json"
 
+# pipeline de cada dia: ler payload → inferir cursos → enviar, com N threads por etapa
+# (inferir é CPU: por causa do GIL, mais threads ali só ajudam a sobrepor com a rede)
+WORKERS_INFERIR = int(os.getenv("MAIN_WORKERS_INFERIR", "2"))
+WORKERS_ENVIO = int(os.getenv("MAIN_WORKERS_ENVIO", "8"))
+FILA_ETAPA = 64  # itens esperando entre uma etapa e a próxima
+# o payload do Read IA chega alguns minutos depois do fim da reunião: antes disso, sem payload não é falta
+MARGEM_READ = timedelta(minutes=15)
+_FIM = object()
 
 
 def normalizar_agente(agente: str) -> str:
@@ -33,68 +62,370 @@ def normalizar_agente(agente: str) -> str:
     return (agente or "").strip()
 
 
-def main():
-    print("🔄 Iniciando automação de monitorias...\n")
-
-    # Data de hoje (aceita yyyy-mm-dd no forms_http.py)
-    data_execucao = date.today().strftime("%Y-%m-%d")
-    print("📆 Data execução:", data_execucao)
-    debug_read_datas()
-    # 1) Conecta à agenda
-    print("📅 Conectando ao Google Calendar...")
-    service = conectar_agenda()
-
-    # 2) Busca monitorias do dia
-    monitorias = monitorias_do_dia(service)
-    print(f"📌 Monitorias encontradas hoje: {len(monitorias)}\n")
-
-    if not monitorias:
-        print("⚠️ Nenhuma monitoria encontrada para hoje.")
-        return
-
-    # 3) Processa cada monitoria
-    for idx, m in enumerate(monitorias, start=1):
-        print(f"➡️ [{idx}/{len(monitorias)}] Processando aluno: {m['nome']}")
-
-        # 3.1) Consulta Read IA (presença, relatório, link)
-        read = analisar_monitoria(
-            titulo_agenda=m['titulo'],
-            meet_id_agenda=m.get('meet_id'),
-            data_execucao=data_execucao
-        )
-        cursos = inferir_cursos_do_summary(read["relatorio"])
-        status = read.get("presenca") or "Falta"
- 
-        # 3.2) Monta dados para o Forms
-        dados_forms = {
-            "nome": m["nome"],
-            "matricula": m["matricula"],
-            "data": data_execucao,
-            "agente": normalizar_agente(m.get("agente")),
-            "status": status,                   # "Presente" / "Falta"
-            "relatorio": read.get("relatorio", ""),
-            "link": read.get("link", ""),
-            "curso":cursos,    # checkbox 
-        }
-
-        # 3.3) Envia para o Google Forms
+def montar_dados_forms(data_execucao: str, m: dict, read: dict, agente: str) -> dict:
+    """Registro do Forms de uma monitoria (m: saída do agenda, read: resultado do read_ia)."""
+    # Presença, relatório e link já vieram do Read IA; os cursos saem do resumo
+    with etapa("inferir_cursos"):
+        cursos = inferir_cursos_com_cache(read["relatorio"])
+    status = read.get("presenca") or "Falta"
+
+    return {
+        "nome": m["nome"],
+        "matricula": m["matricula"],
+        "data": data_execucao,
+        "agente": agente,
+        "status": status,                   # "Presente" / "Falta"
+        "relatorio": read.get("relatorio", ""),
+        "link": read.get("link", ""),
+        "curso": cursos,    # checkbox
+    }
+
+
+def _em_andamento(m: dict) -> bool:
+    # monitoria que ainda não acabou (+ MARGEM_READ): a "Falta" iria pro registro de envios pra sempre
+    if not m.get("fim"):
+        return False
+    fim = datetime.fromisoformat(m["fim"].replace("Z", "+00:00"))
+    if fim.tzinfo is None:
+        fim = fim.replace(tzinfo=timezone.utc)
+    return fim + MARGEM_READ > datetime.now(timezone.utc)
+
+
+def _no_ledger(fn, *args, tentativas: int = 5):
+    # o webhook (envio imediato) e o agendador escrevem no mesmo ledger: "database is locked" passa
+    for tentativa in range(1, tentativas + 1):
         try:
-            resp = enviar_forms_http(dados_forms)
-            if resp.ok:
-                print(f"   ✅ Enviado com sucesso ({resp.status_code})")
-            else:
-                print(f"   ❌ Erro ao enviar ({resp.status_code})")
-                # se quiser, loga um pedacinho pra debug:
-                # print("   ↳", resp.text_snippet)
+            return fn(*args)
+        except sqlite3.OperationalError:
+            if tentativa == tentativas:
+                raise
+            time.sleep(0.2 * tentativa)
+
+
+def processar_dia(
+    data_execucao: str,
+    monitorias: list[dict],
+    payloads_dia: list[PayloadRead] | None = None,
+    dry_run: bool = False,
+    so_presentes: bool = False,
+):
+    """
+    Cruza as monitorias de um dia com o Read IA, infere cursos e envia o que falta para o Forms.
+    dry_run=True só mostra o que seria enviado (nada vai pro Forms nem pro registro de envios).
+    so_presentes=True deixa de fora quem ainda não tem payload do Read IA (ciclos do agendador
+    durante o dia: a monitoria pode nem ter acontecido); a "Falta" só vai na execução completa.
+    """
+    # 3) Cruza todas as monitorias com os payloads do Read IA de uma vez (só o índice)
+    with etapa("analisar_monitorias"):
+        casadas, nao_casados = casar_monitorias(monitorias, data_execucao, payloads_dia)
+    somar("monitorias", len(monitorias))
+    somar("read_nao_casados", len(nao_casados))
+    if nao_casados:
+        print(f"⚠️ Payloads do Read IA sem monitoria correspondente: {len(nao_casados)}")
+        for p in nao_casados:
+            print(f"   ↳ {p.titulo or '(sem título)'} ({p.arquivo})")
+        print()
+
+    # 4) Pipeline em etapas ligadas por filas limitadas (a rede não espera a inferência e vice-versa):
+    #    4.1) 1 thread: pula o que já foi aceito pelo Forms (reexecução só manda o que falta)
+    #         e lê o relatório/link do payload de quem casou
+    #    4.2) WORKERS_INFERIR threads: infere os cursos e monta o registro do Forms
+    #    4.3) WORKERS_ENVIO threads: reserva a linha no registro de envios (o webhook/agendador
+    #         podem estar mandando o mesmo registro), envia (mesma conexão, freando se o Google
+    #         reclamar) e grava cada resultado no registro de envios assim que ele chega
+    fila_inferir: queue.Queue = queue.Queue(maxsize=FILA_ETAPA)
+    fila_enviar: queue.Queue = queue.Queue(maxsize=FILA_ETAPA)
+    contagem = {"ja_aceitos": 0, "aguardando": 0, "em_andamento": 0, "pendentes": 0, "reservados": 0}
+    erros: list[Exception] = []
+
+    def ler():
+        try:
+            for idx, (m, linha) in enumerate(zip(monitorias, casadas), start=1):
+                if erros:
+                    break
+                agente = normalizar_agente(m.get("agente"))
+                chave = chave_registro(m)
+                if ja_aceito(data_execucao, chave, agente):
+                    contagem["ja_aceitos"] += 1
+                    continue
+                if linha is None and _em_andamento(m):
+                    contagem["em_andamento"] += 1
+                    continue
+                if so_presentes and linha is None:
+                    contagem["aguardando"] += 1
+                    continue
+                with etapa("ler_payload"):
+                    read = ler_resultado(linha)
+                fila_inferir.put((contagem["pendentes"], idx, m, chave, agente, read))
+                contagem["pendentes"] += 1
+        except Exception as e:
+            erros.append(e)
+        finally:
+            for _ in range(WORKERS_INFERIR):
+                fila_inferir.put(_FIM)
+
+    def inferir():
+        try:
+            while (item := fila_inferir.get()) is not _FIM:
+                if erros:
+                    continue  # alguma etapa quebrou: só esvazia a fila pra ninguém ficar preso no put
+                seq, idx, m, chave, agente, read = item
+                dados = montar_dados_forms(data_execucao, m, read, agente)
+                fila_enviar.put(((seq, idx, m, chave, dados), dados))
+        except Exception as e:
+            erros.append(e)
+            while fila_inferir.get() is not _FIM:
+                pass
+        finally:
+            fila_enviar.put(_FIM)
 
+    def reservado(ident: tuple) -> bool:
+        _, _, _, chave, dados = ident
+        try:
+            if dry_run or _no_ledger(reservar, data_execucao, chave, dados["agente"], hash_payload(dados)):
+                return True
         except Exception as e:
-            print(f"   ❌ Falha ao enviar: {e}")
+            erros.append(e)
+            return False
+        contagem["reservados"] += 1
+        concluir(ident, {"reservado": True})
+        return False
 
+    def para_enviar():
+        # roda com o lock do enviar_forms_fluxo: nunca levanta, senão os _FIM não são consumidos
+        restantes = WORKERS_INFERIR
+        while restantes:
+            item = fila_enviar.get()
+            if item is _FIM:
+                restantes -= 1
+            elif not erros and reservado(item[0]):
+                yield item
+
+    # a saída sai na ordem das monitorias, mesmo com os envios terminando fora de ordem
+    prontos: dict[int, tuple] = {}
+    proximo = 0
+    lock_saida = threading.Lock()
+
+    def mostrar(idx: int, m: dict, dados: dict, r: dict):
+        print(f"➡️ [{idx}/{len(monitorias)}] Aluno: {m['nome']}")
+        if dry_run:
+            url_post, payload, _ = montar_payload(dados)
+            print(f"   POST {url_post}")
+            print("   " + json.dumps(payload, ensure_ascii=False, indent=2).replace("\n", "\n   "))
+        elif r.get("reservado"):
+            print("   ⏭️ Outro processo já está enviando este registro")
+        elif r.get("erro_registro"):
+            print(f"   ⚠️ Enviado ({r['status_code']}), mas não gravou no registro de envios: {r['erro_registro']}")
+        elif r["ok"]:
+            print(f"   ✅ Enviado com sucesso ({r['status_code']})")
+        elif r["status_code"]:
+            print(f"   ❌ Erro ao enviar ({r['status_code']}, {r['tentativas']} tentativa(s))")
+        else:
+            print(f"   ❌ Falha ao enviar: {r['erro']}")
         print("-" * 50)
 
+    def concluir(ident: tuple, r: dict):
+        nonlocal proximo
+        seq, idx, m, chave, dados = ident
+        try:
+            if not dry_run and not r.get("reservado"):
+                registrar_tempo("forms_envio", r["duracao_s"])
+                somar("forms_enviados" if r["ok"] else "forms_falhas")
+                _no_ledger(registrar, data_execucao, chave, dados["agente"], hash_payload(dados), r)
+        except Exception as e:
+            # o registro desse envio ficou sem ledger: não trava a saída dos próximos, o erro sobe no fim
+            erros.append(e)
+            r = {**r, "erro_registro": f"{type(e).__name__}: {e}"}
+        finally:
+            with lock_saida:
+                prontos[seq] = (idx, m, dados, r)
+                while proximo in prontos:
+                    mostrar(*prontos.pop(proximo))
+                    proximo += 1
+
+    if dry_run:
+        print("🧪 Dry-run: registros que seriam enviados\n")
+    else:
+        print("📤 Enviando para o Google Forms...\n")
+    with etapa("forms_lote"), ThreadPoolExecutor(max_workers=1 + WORKERS_INFERIR) as ex:
+        etapas = [ex.submit(ler)] + [ex.submit(inferir) for _ in range(WORKERS_INFERIR)]
+        # um gerador só: é ele que conta os _FIM das threads de inferência
+        fila = para_enviar()
+        try:
+            if dry_run:
+                for ident, _ in fila:
+                    concluir(ident, {})
+            else:
+                enviar_forms_fluxo(fila, WORKERS_ENVIO, ao_concluir=concluir)
+        except Exception as e:
+            if e not in erros:
+                erros.append(e)
+            for _ in fila:  # libera as etapas de trás até o último _FIM (se ainda faltar algum)
+                pass
+        for f in etapas:
+            f.result()
+    if erros:
+        # o que ficou esperando um registro que não chegou a ser enviado também aparece
+        for seq in sorted(prontos):
+            mostrar(*prontos.pop(seq))
+        raise erros[0]
+
+    somar("forms_ja_aceitos", contagem["ja_aceitos"])
+    if contagem["reservados"]:
+        somar("forms_reservados_por_outro", contagem["reservados"])
+    if contagem["ja_aceitos"]:
+        print(f"⏭️ Já aceitos pelo Forms numa execução anterior: {contagem['ja_aceitos']}")
+    if contagem["em_andamento"]:
+        somar("monitorias_em_andamento", contagem["em_andamento"])
+        print(f"⏳ Monitorias ainda em andamento, sem payload do Read IA (ficam pra próxima execução): {contagem['em_andamento']}")
+    if contagem["aguardando"]:
+        somar("read_aguardando", contagem["aguardando"])
+        print(f"⏳ Ainda sem payload do Read IA (ficam pra execução completa): {contagem['aguardando']}")
+    if not contagem["pendentes"]:
+        print("✅ Nada pendente para enviar.")
+
+
+def _data(s: str) -> date:
+    try:
+        return date.fromisoformat(s)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Data inválida (use YYYY-MM-DD): {s}")
+
+
+def _ler_eventos(path: Path) -> list[dict]:
+    # aceita a lista de eventos ou a resposta inteira do events.list ({"items": [...]})
+    dados = json.loads(path.read_text(encoding="utf-8"))
+    return dados.get("items", []) if isinstance(dados, dict) else dados
+
+
+def executar(
+    inicio: date,
+    fim: date,
+    eventos: list[dict] | None = None,
+    debug_read: bool = False,
+    so_presentes: bool = False,
+):
+    """
+    Roda o fluxo de `inicio` a `fim`.
+    eventos: lista de eventos já em mãos (--dry-run): não conecta no Google nem envia nada.
+    so_presentes: só envia quem já tem payload do Read IA (ver processar_dia).
+    """
+    dry_run = eventos is not None
+    print("🔄 Iniciando automação de monitorias..." + (" (dry-run)" if dry_run else "") + "\n")
+
+    # Data(s) de execução (aceita yyyy-mm-dd no forms_http.py)
+    if inicio == fim:
+        print("📆 Data execução:", inicio.isoformat())
+    else:
+        print(f"📆 Período: {inicio.isoformat()} a {fim.isoformat()}")
+    print("📂 Pasta Read IA:", read_ia.PASTA_READ)
+    if debug_read:
+        debug_read_datas()
+
+    # 1) Conecta à agenda e 2) busca monitorias do período (uma consulta paginada)
+    if dry_run:
+        monitorias = [
+            m for m in monitorias_dos_eventos(eventos)
+            if inicio.isoformat() <= m["data"] <= fim.isoformat()
+        ]
+    else:
+        print("📅 Conectando ao Google Calendar...")
+        with etapa("auth_agenda"):
+            service = conectar_agenda()
+        with etapa("eventos_agenda"):
+            monitorias = monitorias_do_periodo(service, inicio, fim)
+
+    # ... e os payloads do Read IA (uma leitura só)
+    with etapa("carregar_payloads"):
+        payloads = carregar_payloads_periodo(inicio.isoformat(), fim.isoformat())
+
+    por_dia: dict[str, list[dict]] = {}
+    for m in monitorias:
+        por_dia.setdefault(m["data"], []).append(m)
+
+    # 3) Um dia de cada vez
+    dia = inicio
+    while dia <= fim:
+        data_execucao = dia.isoformat()
+        monitorias_dia = por_dia.get(data_execucao, [])
+        if inicio != fim:
+            print(f"\n📆 ===== {data_execucao} =====")
+        print(f"📌 Monitorias encontradas: {len(monitorias_dia)}\n")
+
+        if monitorias_dia:
+            with etapa("processar_dia"):
+                processar_dia(
+                    data_execucao, monitorias_dia, payloads.get(data_execucao, []), dry_run, so_presentes
+                )
+        else:
+            print("⚠️ Nenhuma monitoria encontrada para o dia.")
+        dia += timedelta(days=1)
+
     print("\n🏁 Automação finalizada.")
 
 
+def main(argv: list[str] | None = None):
+    global WORKERS_INFERIR, WORKERS_ENVIO
+    parser = argparse.ArgumentParser(description="Automação de relatórios de monitoria.")
+    parser.add_argument("--from", dest="inicio", type=_data, help="primeiro dia (YYYY-MM-DD); padrão: hoje")
+    parser.add_argument("--to", dest="fim", type=_data, help="último dia (YYYY-MM-DD); padrão: --from")
+    parser.add_argument("--profile", action="store_true", help="roda com cProfile e salva as estatísticas em data/")
+    parser.add_argument("--metricas-json", type=Path, default=METRICAS_JSON, help="resumo de tempos/contadores")
+    parser.add_argument(
+        "--metricas-prom", type=Path, default=os.getenv("METRICAS_PROM") or None,
+        help="arquivo .prom para o textfile collector do node-exporter",
+    )
+    parser.add_argument(
+        "--dry-run", dest="eventos", type=Path, metavar="EVENTOS_JSON",
+        help="lê os eventos deste JSON (formato do events.list) em vez do Google e só mostra os payloads do Forms",
+    )
+    parser.add_argument("--debug-read", action="store_true", help="mostra quantos payloads do Read IA há por data")
+    parser.add_argument("--workers-inferir", type=int, help=f"threads inferindo cursos (padrão: {WORKERS_INFERIR})")
+    parser.add_argument("--workers-envio", type=int, help=f"envios simultâneos ao Forms (padrão: {WORKERS_ENVIO})")
+    args = parser.parse_args(argv)
+
+    WORKERS_INFERIR = max(1, args.workers_inferir or WORKERS_INFERIR)
+    WORKERS_ENVIO = max(1, args.workers_envio or WORKERS_ENVIO)
+
+    eventos = _ler_eventos(args.eventos) if args.eventos else None
+    inicio, fim = args.inicio, args.fim
+    if eventos and inicio is None:
+        # dry-run sem --from: o período dos eventos do arquivo
+        datas = sorted(m["data"] for m in monitorias_dos_eventos(eventos))
+        if datas:
+            inicio, fim = date.fromisoformat(datas[0]), fim or date.fromisoformat(datas[-1])
+    inicio = inicio or date.today()
+    fim = fim or inicio
+    if fim < inicio:
+        parser.error("--to não pode ser antes de --from")
+
+    zerar()
+    try:
+        with etapa("total"):
+            if args.profile:
+                import cProfile
+
+                perfil = cProfile.Profile()
+                try:
+                    perfil.runcall(executar, inicio, fim, eventos, args.debug_read)
+                finally:
+                    destino = BASE_DIR / "data" / f"profile_{datetime.now():%Y%m%d_%H%M%S}.pstats"
+                    destino.parent.mkdir(parents=True, exist_ok=True)
+                    perfil.dump_stats(destino)
+                    print(f"🧪 Perfil salvo em {destino} (veja com: python -m pstats {destino})")
+            else:
+                executar(inicio, fim, eventos, args.debug_read)
+    finally:
+        dados = resumo()
+        # dry-run não sobrescreve as métricas da última execução de verdade
+        if eventos is None:
+            salvar_json(args.metricas_json, dados)
+            if args.metricas_prom:
+                salvar_prometheus(args.metricas_prom, dados)
+        print("\n⏱️ Tempos por etapa:")
+        for nome, e in dados["etapas"].items():
+            print(f"   {nome}: {e['total_s']:.3f}s (n={e['n']}, p50={e['p50_s']:.3f}s, p95={e['p95_s']:.3f}s)")
+
+
 if __name__ == "__main__":
     main()
-   
\ No newline at end of file
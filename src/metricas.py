@@ -0,0 +1,119 @@
+"""
+metricas.py
+Tempos por etapa / por registro e contadores da execução.
+
+- etapa("nome") mede um bloco (pode repetir: vira amostra, ex.: uma por registro)
+- somar("nome", n) soma contadores (bytes lidos, registros enviados...)
+- no fim: resumo em JSON e, se quiser, arquivo .prom pro textfile collector do node-exporter
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+_amostras: dict[str, list[float]] = {}
+_contadores: dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def zerar():
+    with _lock:
+        _amostras.clear()
+        _contadores.clear()
+
+
+def registrar(nome: str, segundos: float):
+    with _lock:
+        _amostras.setdefault(nome, []).append(segundos)
+
+
+def somar(nome: str, valor: float = 1):
+    with _lock:
+        _contadores[nome] = _contadores.get(nome, 0) + valor
+
+
+@contextmanager
+def etapa(nome: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(nome, time.perf_counter() - t0)
+
+
+def amostras(nome: str) -> list[float]:
+    """Cópia ordenada das amostras de uma etapa (pra percentis que o resumo não traz)."""
+    with _lock:
+        return sorted(_amostras.get(nome, []))
+
+
+def _percentil(ordenados: list[float], p: float) -> float:
+    # nearest-rank
+    if not ordenados:
+        return 0.0
+    k = max(0, math.ceil(p * len(ordenados)) - 1)
+    return ordenados[k]
+
+
+def resumo() -> dict:
+    with _lock:
+        amostras = {k: sorted(v) for k, v in _amostras.items()}
+        contadores = dict(_contadores)
+
+    etapas = {
+        nome: {
+            "n": len(v),
+            "total_s": round(sum(v), 6),
+            "p50_s": round(_percentil(v, 0.50), 6),
+            "p95_s": round(_percentil(v, 0.95), 6),
+            "max_s": round(v[-1], 6),
+        }
+        for nome, v in amostras.items()
+    }
+    return {"gerado_em": time.time(), "etapas": etapas, "contadores": contadores}
+
+
+def _gravar(path: Path, texto: str):
+    # grava e renomeia: o node-exporter nunca lê arquivo pela metade
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    tmp.write_text(texto, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def salvar_json(path: Path, dados: dict | None = None):
+    _gravar(path, json.dumps(dados or resumo(), ensure_ascii=False, indent=2))
+
+
+def _nome_prom(nome: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", nome)
+
+
+def salvar_prometheus(path: Path, dados: dict | None = None, prefixo: str = "monitorias"):
+    dados = dados or resumo()
+    linhas = [
+        f"# HELP {prefixo}_etapa_segundos Duração de cada etapa da execução.",
+        f"# TYPE {prefixo}_etapa_segundos summary",
+    ]
+    for nome, e in dados["etapas"].items():
+        rotulo = f'etapa="{_nome_prom(nome)}"'
+        linhas.append(f'{prefixo}_etapa_segundos{{{rotulo},quantile="0.5"}} {e["p50_s"]}')
+        linhas.append(f'{prefixo}_etapa_segundos{{{rotulo},quantile="0.95"}} {e["p95_s"]}')
+        linhas.append(f"{prefixo}_etapa_segundos_sum{{{rotulo}}} {e['total_s']}")
+        linhas.append(f"{prefixo}_etapa_segundos_count{{{rotulo}}} {e['n']}")
+
+    for nome, valor in dados["contadores"].items():
+        metrica = f"{prefixo}_{_nome_prom(nome)}"
+        linhas.append(f"# TYPE {metrica} gauge")
+        linhas.append(f"{metrica} {valor}")
+
+    linhas.append(f"# TYPE {prefixo}_ultima_execucao_timestamp_seconds gauge")
+    linhas.append(f"{prefixo}_ultima_execucao_timestamp_seconds {dados['gerado_em']}")
+    _gravar(path, "\n".join(linhas) + "\n")
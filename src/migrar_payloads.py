@@ -0,0 +1,67 @@
+"""
+migrar_payloads.py
+Reorganiza uma pasta "plana" de payloads do Read IA (read_<ts>_<session>.json na raiz)
+no layout particionado usado pelo webhook_read:
+
+  <pasta>/<YYYY-MM-DD>/      meeting_end, pela data local (America/Sao_Paulo)
+  <pasta>/_outros/<trigger>/ demais triggers
+  <pasta>/_invalidos/        arquivos que não são JSON válido
+
+Uso (uma vez só):
+  python migrar_payloads.py                 # usa read_ia.PASTA_READ
+  python migrar_payloads.py --pasta X --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from read_ia import PASTA_READ, pasta_particao
+
+PASTA_INVALIDOS = "_invalidos"
+
+
+def migrar(pasta: Path, dry_run: bool = False) -> dict[str, int]:
+    contagem = {"movidos": 0, "invalidos": 0, "ja_existiam": 0}
+
+    for arq in sorted(pasta.glob("*.json")):
+        try:
+            data = json.loads(arq.read_text(encoding="utf-8"))
+            destino = pasta_particao(pasta, data if isinstance(data, dict) else {})
+        except Exception:
+            destino = pasta / PASTA_INVALIDOS
+            contagem["invalidos"] += 1
+
+        alvo = destino / arq.name
+        if alvo.exists():
+            print(f"⚠️ Já existe, mantido na raiz: {arq.name}")
+            contagem["ja_existiam"] += 1
+            continue
+
+        if not dry_run:
+            destino.mkdir(parents=True, exist_ok=True)
+            arq.rename(alvo)
+        contagem["movidos"] += 1
+
+    return contagem
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Particiona por data a pasta de payloads do Read IA.")
+    parser.add_argument("--pasta", type=Path, default=PASTA_READ)
+    parser.add_argument("--dry-run", action="store_true", help="só mostra o que seria movido")
+    args = parser.parse_args()
+
+    print("📂 Pasta Read IA:", args.pasta)
+    contagem = migrar(args.pasta, dry_run=args.dry_run)
+    print(
+        f"🏁 {'(dry-run) ' if args.dry_run else ''}"
+        f"Movidos: {contagem['movidos']} | Inválidos: {contagem['invalidos']} | "
+        f"Já existiam: {contagem['ja_existiam']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import json
+import sqlite3
+from dataclasses import dataclass, fields
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from zoneinfo import ZoneInfo
 
+from metricas import somar
+
 # ✅ pega a raiz do projeto (um nível acima de /src)
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -18,19 +22,260 @@ CANDIDATAS = [
 PASTA_READ = next((p for p in CANDIDATAS if p.exists()), BASE_DIR / "read_payloads")
 
 
-def _carregar_payloads():
-    payloads = []
-    if not PASTA_READ.exists():
-        return payloads
-
-    for arq in PASTA_READ.glob("*.json"):
-        try:
-            data = json.loads(arq.read_text(encoding="utf-8"))
-            data["_arquivo"] = str(arq)
-            payloads.append(data)
-        except Exception:
-            pass
-    return payloads
+# ✅ layout particionado (gravado pelo webhook_read):
+#   <PASTA_READ>/<YYYY-MM-DD>/read_*.json      meeting_end, pela data local (SP)
+#   <PASTA_READ>/_outros/<trigger>/read_*.json  demais triggers
+# arquivos soltos na raiz (layout antigo) continuam sendo lidos até rodar o migrar_payloads.py
+PASTA_OUTROS = "_outros"
+PASTA_SEM_DATA = "_sem_data"
+
+
+def pasta_particao(base: Path, p: dict) -> Path:
+    """Partição onde o payload deve ficar dentro de `base`."""
+    gatilho = (p.get("trigger") or "").strip().lower()
+    if gatilho != "meeting_end":
+        nome = re.sub(r"[^a-z0-9_\-]", "_", gatilho) or "sem_trigger"
+        return base / PASTA_OUTROS / nome
+    return base / (_payload_date_local(p) or PASTA_SEM_DATA)
+
+
+# ✅ índice em SQLite: guarda só as chaves de busca de cada JSON (data local, meet_id,
+# matrículas, título normalizado) e só relê arquivos novos/alterados (mtime/tamanho)
+INDICE_PATH = BASE_DIR / "data" / "read_index.sqlite"
+
+# mudou o schema? sobe a versão e o índice é recriado (é só cache)
+_VERSAO_INDICE = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS payloads (
+    arquivo     TEXT PRIMARY KEY,
+    pasta       TEXT NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    tamanho     INTEGER NOT NULL,
+    gatilho     TEXT,
+    data_local  TEXT,
+    start_time  TEXT,
+    meet_id     TEXT,
+    matriculas  TEXT,
+    titulo      TEXT,
+    titulo_norm TEXT,
+    report_url  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_payloads_pasta ON payloads (pasta);
+CREATE INDEX IF NOT EXISTS idx_payloads_dia ON payloads (gatilho, data_local);
+CREATE INDEX IF NOT EXISTS idx_payloads_meet ON payloads (data_local, meet_id);
+CREATE INDEX IF NOT EXISTS idx_payloads_titulo ON payloads (data_local, titulo_norm);
+"""
+
+_COLUNAS = (
+    "arquivo", "pasta", "mtime_ns", "tamanho", "gatilho", "data_local", "start_time",
+    "meet_id", "matriculas", "titulo", "titulo_norm", "report_url",
+)
+
+
+
+@dataclass(frozen=True, slots=True)
+class PayloadRead:
+    """
+    Um payload meeting_end do jeito que o matcher usa: só as chaves de busca,
+    com data local e título normalizado já calculados (vêm do índice).
+    summary, transcript etc. ficam no disco: carregar() lê o JSON completo,
+    e só é chamado para quem casou com uma monitoria.
+    """
+
+    arquivo: str
+    data_local: str | None
+    start_time: str
+    meet_id: str | None
+    matriculas: str  # todas as matrículas do título, separadas por espaço
+    titulo: str
+    titulo_norm: str
+    report_url: str
+
+    def carregar(self) -> dict:
+        return _ler_payload(self.arquivo)
+
+
+_SELECT_REGISTRO = f"SELECT {', '.join(f.name for f in fields(PayloadRead))} FROM payloads"
+
+_con: sqlite3.Connection | None = None
+_escopos_atualizados: set[str] = set()
+_RAIZ = "raiz"
+
+
+def _conexao() -> sqlite3.Connection:
+    global _con
+    if _con is None:
+        INDICE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _con = sqlite3.connect(INDICE_PATH)
+        _con.row_factory = sqlite3.Row
+        if _con.execute("PRAGMA user_version").fetchone()[0] != _VERSAO_INDICE:
+            _con.execute("DROP TABLE IF EXISTS payloads")
+            _con.execute(f"PRAGMA user_version = {_VERSAO_INDICE}")
+        _con.executescript(_SCHEMA)
+    return _con
+
+
+def _linha_indice(arq: Path, mtime_ns: int, tamanho: int) -> tuple:
+    somar("read_arquivos_indexados")
+    somar("read_bytes_lidos", tamanho)
+    try:
+        p = json.loads(arq.read_text(encoding="utf-8"))
+    except Exception:
+        p = None
+
+    if not isinstance(p, dict):
+        # arquivo inválido fica registrado (sem gatilho) pra não ser relido a cada execução
+        return (str(arq), str(arq.parent), mtime_ns, tamanho) + (None,) * 8
+
+    r = registro_do_payload(arq, p)
+    return (
+        r.arquivo,
+        str(arq.parent),
+        mtime_ns,
+        tamanho,
+        (p.get("trigger") or "").strip().lower(),
+        r.data_local,
+        r.start_time,
+        r.meet_id,
+        r.matriculas,
+        r.titulo,
+        r.titulo_norm,
+        r.report_url,
+    )
+
+
+def registro_do_payload(arquivo: str | Path, p: dict) -> PayloadRead:
+    """PayloadRead de um payload já em memória (ex.: recém-gravado pelo webhook), sem passar pelo índice."""
+    titulo = p.get("title") or ""
+    return PayloadRead(
+        str(arquivo),
+        _payload_date_local(p),
+        p.get("start_time") or "",
+        (p.get("platform_meeting_id") or "").strip().lower() or None,
+        " ".join(dict.fromkeys(m.group(1) for m in MAT_RE.finditer(titulo.upper()))),
+        titulo,
+        _normalizar(titulo),
+        p.get("report_url", "") or "",
+    )
+
+
+def _sincronizar_pasta(con: sqlite3.Connection, pasta: Path) -> int:
+    conhecidos = {
+        r["arquivo"]: (r["mtime_ns"], r["tamanho"])
+        for r in con.execute("SELECT arquivo, mtime_ns, tamanho FROM payloads WHERE pasta = ?", (str(pasta),))
+    }
+
+    vistos = set()
+    novos = []
+    if pasta.is_dir():
+        for arq in pasta.glob("*.json"):
+            try:
+                st = arq.stat()
+            except OSError:
+                continue
+            vistos.add(str(arq))
+            if conhecidos.get(str(arq)) == (st.st_mtime_ns, st.st_size):
+                continue
+            novos.append(_linha_indice(arq, st.st_mtime_ns, st.st_size))
+
+    sumiram = [(a,) for a in conhecidos if a not in vistos]
+
+    with con:
+        con.executemany(
+            f"INSERT OR REPLACE INTO payloads ({', '.join(_COLUNAS)}) "
+            f"VALUES ({', '.join('?' * len(_COLUNAS))})",
+            novos,
+        )
+        con.executemany("DELETE FROM payloads WHERE arquivo = ?", sumiram)
+    return len(novos)
+
+
+def atualizar_indice(data_execucao: str | None = None, raiz: bool = True) -> int:
+    """
+    Sincroniza o índice com a PASTA_READ:
+    - (re)lê só os JSON novos ou com mtime/tamanho diferentes
+    - remove do índice os arquivos que sumiram da pasta
+    - com data_execucao, olha só a partição do dia (+ arquivos soltos na raiz, do layout antigo,
+      se raiz=True); sem data, varre todas as partições
+    Retorna quantos arquivos foram (re)lidos.
+    """
+    con = _conexao()
+
+    if data_execucao:
+        pastas = ([PASTA_READ] if raiz else []) + [PASTA_READ / data_execucao]
+    else:
+        pastas = [PASTA_READ]
+        if PASTA_READ.is_dir():
+            pastas += [d for d in PASTA_READ.rglob("*") if d.is_dir()]
+        # partições apagadas inteiras também saem do índice
+        for r in con.execute("SELECT DISTINCT pasta FROM payloads").fetchall():
+            if Path(r["pasta"]) not in pastas:
+                pastas.append(Path(r["pasta"]))
+
+    return sum(_sincronizar_pasta(con, pasta) for pasta in pastas)
+
+
+def _indice(data_execucao: str | None = None) -> sqlite3.Connection:
+    # sincroniza cada escopo (um dia ou a pasta toda) uma vez por processo;
+    # depois disso são só consultas indexadas
+    # a raiz (arquivos soltos do layout antigo) entra só na primeira: num backfill de 31 dias
+    # sobre uma pasta ainda não migrada, ela é varrida uma vez, não 31
+    escopo = data_execucao or "*"
+    if escopo not in _escopos_atualizados and "*" not in _escopos_atualizados:
+        atualizar_indice(data_execucao, raiz=_RAIZ not in _escopos_atualizados)
+        _escopos_atualizados.update((escopo, _RAIZ))
+    return _conexao()
+
+
+def esquecer_sincronizacao() -> None:
+    """Processo longo (agendador): a próxima consulta de cada escopo volta a conferir a pasta."""
+    _escopos_atualizados.clear()
+
+
+def _carregar_payloads(data_execucao: str | None = None) -> list[PayloadRead]:
+    """
+    Payloads meeting_end do índice, como PayloadRead (só as chaves de busca).
+    Com data_execucao, só os do dia (data local de São Paulo).
+    """
+    sql = _SELECT_REGISTRO + " WHERE gatilho = 'meeting_end'"
+    args: tuple = ()
+    if data_execucao:
+        sql += " AND data_local = ?"
+        args = (data_execucao,)
+    return [PayloadRead(*r) for r in _indice(data_execucao).execute(sql, args)]
+
+
+def carregar_payloads_periodo(inicio: str, fim: str) -> dict[str, list[PayloadRead]]:
+    """
+    Payloads meeting_end de um intervalo de datas (YYYY-MM-DD, inclusivo), agrupados por data local.
+    Sincroniza só as partições do intervalo e lê tudo numa consulta só.
+    """
+    dia, ultimo = date.fromisoformat(inicio), date.fromisoformat(fim)
+    while dia <= ultimo:
+        _indice(dia.isoformat())
+        dia += timedelta(days=1)
+
+    por_data: dict[str, list[PayloadRead]] = {}
+    for r in _conexao().execute(
+        _SELECT_REGISTRO + " WHERE gatilho = 'meeting_end' AND data_local BETWEEN ? AND ?",
+        (inicio, fim),
+    ):
+        registro = PayloadRead(*r)
+        por_data.setdefault(registro.data_local, []).append(registro)
+    return por_data
+
+
+def _ler_payload(arquivo: str) -> dict:
+    # payload completo só é lido do disco para o registro que casou
+    try:
+        bruto = Path(arquivo).read_bytes()
+        somar("read_bytes_lidos", len(bruto))
+        data = json.loads(bruto.decode("utf-8"))
+    except Exception:
+        data = {}
+    data["_arquivo"] = arquivo
+    return data
 
 
 import re
@@ -80,84 +325,127 @@ def _extrair_matricula(texto: str) -> str | None:
     m = MAT_RE.search(texto or "")
     return m.group(1) if m else None
 
-def _mais_recente(payloads: list[dict]) -> dict | None:
+def _mais_recente(payloads: list[PayloadRead]) -> PayloadRead | None:
     def key(p):
-        return _parse_iso_dt(p.get("start_time") or "") or datetime.min
-    return sorted(payloads, key=key, reverse=True)[0] if payloads else None
+        return _parse_iso_dt(p.start_time or "") or datetime.min
+    return max(payloads, key=key) if payloads else None
 
 
-def analisar_monitoria(titulo_agenda: str, meet_id_agenda: str | None, data_execucao: str):
-    payloads = _carregar_payloads()
-    payloads = [p for p in payloads if (p.get("trigger") or "").strip().lower() == "meeting_end"]
-
-    # ✅ só payloads do dia que você está rodando
-    payloads_dia = [p for p in payloads if _payload_date_local(p) == data_execucao]
-
-    if not payloads_dia:
+def ler_resultado(linha: PayloadRead | None) -> dict:
+    # presença/link/relatório de uma monitoria; o JSON completo só é lido aqui
+    if not linha:
         return {"presenca": "Falta", "link": "", "relatorio": "", "payload": None}
 
+    p = linha.carregar()
+    return {
+        "presenca": "Presente",
+        "link": p.get("report_url", "") or linha.report_url or "",
+        "relatorio": p.get("summary", "") or "",
+        "payload": p
+    }
+
+
+def _indexar_dia(linhas: list[PayloadRead]) -> dict[str, dict[str, PayloadRead]]:
+    """
+    Monta, uma vez para o dia, os índices meet_id / matrícula / título normalizado.
+    Cada chave já guarda só o payload mais recente (regra "mais novo vence").
+    """
+    indices: dict[str, dict[str, list[PayloadRead]]] = {"meet_id": {}, "matricula": {}, "titulo_norm": {}}
+    for linha in linhas:
+        for campo, chaves in (
+            ("meet_id", (linha.meet_id,)),
+            # o título pode ter mais de um código (ex.: "Python3 turma AB2026 - Ana ABC123"): todos valem
+            ("matricula", linha.matriculas.split()),
+            ("titulo_norm", (linha.titulo_norm,)),
+        ):
+            for chave in chaves:
+                if chave:
+                    indices[campo].setdefault(chave, []).append(linha)
+
+    return {
+        campo: {chave: _mais_recente(cand) for chave, cand in por_chave.items()}
+        for campo, por_chave in indices.items()
+    }
+
+
+def _resolver(
+    indices: dict[str, dict[str, PayloadRead]], titulo_agenda: str, meet_id_agenda: str | None
+) -> PayloadRead | None:
     # 1) match por meet_id (melhor)
     if meet_id_agenda:
-        mid = meet_id_agenda.strip().lower()
-        for p in payloads_dia:
-            if (p.get("platform_meeting_id") or "").strip().lower() == mid:
-                return {
-                    "presenca": "Presente",
-                    "link": p.get("report_url", "") or "",
-                    "relatorio": p.get("summary", "") or "",
-                    "payload": p
-                }
+        linha = indices["meet_id"].get(meet_id_agenda.strip().lower())
+        if linha:
+            return linha
 
     # 2) match por matrícula (muito confiável)
     mat = _extrair_matricula(titulo_agenda)
     if mat:
-        mat_norm = mat.lower()
-        cand = []
-        for p in payloads_dia:
-            t = (p.get("title") or "")
-            if mat_norm in (t.lower()):
-                cand.append(p)
-        if cand:
-            p = _mais_recente(cand)
-            return {
-                "presenca": "Presente",
-                "link": p.get("report_url", "") or "",
-                "relatorio": p.get("summary", "") or "",
-                "payload": p
-            }
+        linha = indices["matricula"].get(mat.upper())
+        if linha:
+            return linha
 
     # 3) match por título normalizado (fallback)
-    t_norm = _normalizar(titulo_agenda)
-    cand = [p for p in payloads_dia if _normalizar(p.get("title", "")) == t_norm]
-    if cand:
-        p = _mais_recente(cand)
-        return {
-            "presenca": "Presente",
-            "link": p.get("report_url", "") or "",
-            "relatorio": p.get("summary", "") or "",
-            "payload": p
-        }
+    return indices["titulo_norm"].get(_normalizar(titulo_agenda))
+
+
+def analisar_monitorias(
+    monitorias: list[dict],
+    data_execucao: str,
+    linhas: list[PayloadRead] | None = None,
+) -> tuple[list[dict], list[PayloadRead]]:
+    """
+    Versão em lote de analisar_monitoria: cruza todas as monitorias do dia
+    (saída de agenda.monitorias_do_dia) com os payloads do dia de uma vez só.
+    `linhas` = payloads do dia já carregados (ex.: de carregar_payloads_periodo).
+
+    Retorna (resultados, nao_casados):
+    - resultados: um dict por monitoria, na mesma ordem (presenca, link, relatorio, payload)
+    - nao_casados: payloads meeting_end do dia que não casaram com nenhuma monitoria
+    """
+    casadas, nao_casados = casar_monitorias(monitorias, data_execucao, linhas)
+    return [ler_resultado(linha) for linha in casadas], nao_casados
+
+
+def casar_monitorias(
+    monitorias: list[dict],
+    data_execucao: str,
+    linhas: list[PayloadRead] | None = None,
+) -> tuple[list[PayloadRead | None], list[PayloadRead]]:
+    """
+    Só o casamento (nada é lido do disco além do índice): o PayloadRead de cada monitoria
+    (None = sem payload), na mesma ordem, + os payloads que sobraram.
+    ler_resultado(linha) completa depois, um por vez (ex.: numa etapa do pipeline do main).
+    """
+    if linhas is None:
+        linhas = _carregar_payloads(data_execucao)
+    indices = _indexar_dia(linhas)
+
+    casadas = [_resolver(indices, m.get("titulo", ""), m.get("meet_id")) for m in monitorias]
+    usados = {linha.arquivo for linha in casadas if linha}
+    nao_casados = [l for l in linhas if l.arquivo not in usados]
+    return casadas, nao_casados
+
 
-    return {"presenca": "Falta", "link": "", "relatorio": "", "payload": None}
+def analisar_monitoria(titulo_agenda: str, meet_id_agenda: str | None, data_execucao: str):
+    resultados, _ = analisar_monitorias(
+        [{"titulo": titulo_agenda, "meet_id": meet_id_agenda}], data_execucao
+    )
+    return resultados[0]
 
 
-    # resto igual: match por meet_id, depois por título...
 def debug_read_datas():
-    payloads = _carregar_payloads()
-    payloads = [p for p in payloads if (p.get("trigger") or "").strip().lower() == "meeting_end"]
-
-    datas = {}
-    for p in payloads:
-        d = _payload_date_local(p)
-        if d:
-            datas[d] = datas.get(d, 0) + 1
+    con = _indice()
+    total = con.execute("SELECT COUNT(*) FROM payloads WHERE gatilho = 'meeting_end'").fetchone()[0]
+    datas = con.execute(
+        "SELECT data_local, COUNT(*) AS n FROM payloads "
+        "WHERE gatilho = 'meeting_end' AND data_local IS NOT NULL "
+        "GROUP BY data_local ORDER BY data_local"
+    ).fetchall()
 
     print("\n🧪 DEBUG READ DATAS (meeting_end)")
     print("📂 Pasta Read:", PASTA_READ)
-    print("📦 Total:", len(payloads))
+    print("📦 Total:", total)
     print("📅 Datas encontradas:")
-    for k in sorted(datas.keys()):
-        print(f"  {k}: {datas[k]}")
+    for r in datas:
+        print(f"  {r['data_local']}: {r['n']}")
     print("🧪 FIM DEBUG\n")
-
-
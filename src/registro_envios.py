@@ -0,0 +1,140 @@
+"""
+registro_envios.py
+Livro-caixa local (SQLite em data/) dos envios para o Google Forms.
+
+Cada registro é identificado por (data, chave, agente), onde chave é a matrícula
+(ou o meet_id / título quando não tem matrícula). Guarda hash do payload, status HTTP,
+se foi aceito e quando. Reexecutar o dia só envia o que ainda não foi aceito pelo Forms.
+
+Mais de um processo envia (main, agendador, envio imediato do webhook): antes do POST,
+reservar() marca a linha como "enviando" numa transação só; quem não conseguir reservar pula.
+Reserva de processo que morreu no meio do envio vence depois de RESERVA_TTL_S.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+LEDGER_PATH = BASE_DIR / "data" / "forms_ledger.sqlite"
+RESERVA_TTL_S = 600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS envios (
+    data         TEXT NOT NULL,
+    chave        TEXT NOT NULL,
+    agente       TEXT NOT NULL,
+    payload_hash TEXT NOT NULL,
+    status_code  INTEGER,
+    ok           INTEGER NOT NULL,
+    tentativas   INTEGER NOT NULL,
+    erro         TEXT,
+    enviado_em   TEXT NOT NULL,
+    reservado_em TEXT,
+    PRIMARY KEY (data, chave, agente)
+);
+"""
+
+_con: sqlite3.Connection | None = None
+_lock = threading.Lock()
+
+
+def _conexao() -> sqlite3.Connection:
+    global _con
+    if _con is None:
+        LEDGER_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _con = sqlite3.connect(LEDGER_PATH, check_same_thread=False)
+        _con.executescript(_SCHEMA)
+        # ledger de antes da reserva: ganha a coluna (os dados ficam)
+        if "reservado_em" not in {r[1] for r in _con.execute("PRAGMA table_info(envios)")}:
+            try:
+                _con.execute("ALTER TABLE envios ADD COLUMN reservado_em TEXT")
+            except sqlite3.OperationalError:
+                pass  # outro processo adicionou ao mesmo tempo
+    return _con
+
+
+def chave_registro(monitoria: dict) -> str:
+    return (
+        (monitoria.get("matricula") or "").strip().upper()
+        or (monitoria.get("meet_id") or "").strip().lower()
+        or (monitoria.get("titulo") or "").strip()
+    )
+
+
+def hash_payload(dados: dict) -> str:
+    bruto = json.dumps(dados, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+
+def ja_aceito(data: str, chave: str, agente: str) -> bool:
+    with _lock:
+        linha = _conexao().execute(
+            "SELECT ok FROM envios WHERE data = ? AND chave = ? AND agente = ?",
+            (data, chave, agente),
+        ).fetchone()
+    return bool(linha and linha[0])
+
+
+def reservar(data: str, chave: str, agente: str, payload_hash: str) -> bool:
+    """
+    Reserva o envio de (data, chave, agente) pra este processo, logo antes do POST.
+    False = já foi aceito, ou outro processo está enviando agora (reserva com menos de RESERVA_TTL_S).
+    """
+    agora = datetime.now()
+    limite = (agora - timedelta(seconds=RESERVA_TTL_S)).isoformat(timespec="seconds")
+    with _lock:
+        con = _conexao()
+        with con:
+            cur = con.execute(
+                """
+                INSERT INTO envios (data, chave, agente, payload_hash, ok, tentativas, erro, enviado_em, reservado_em)
+                VALUES (?, ?, ?, ?, 0, 0, '', ?, ?)
+                ON CONFLICT (data, chave, agente) DO UPDATE SET reservado_em = excluded.reservado_em
+                WHERE envios.ok = 0 AND (envios.reservado_em IS NULL OR envios.reservado_em < ?)
+                """,
+                (data, chave, agente, payload_hash, agora.isoformat(timespec="seconds"),
+                 agora.isoformat(timespec="seconds"), limite),
+            )
+    return cur.rowcount == 1
+
+
+def registrar(data: str, chave: str, agente: str, payload_hash: str, resultado: dict) -> None:
+    """
+    Grava o resultado de um envio (dict do forms_http.enviar_forms_lote) e solta a reserva.
+    Aceito nunca volta a falho.
+    """
+    with _lock:
+        con = _conexao()
+        with con:
+            con.execute(
+                """
+                INSERT INTO envios (data, chave, agente, payload_hash, status_code, ok, tentativas, erro, enviado_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (data, chave, agente) DO UPDATE SET
+                    payload_hash = excluded.payload_hash,
+                    status_code  = excluded.status_code,
+                    ok           = excluded.ok,
+                    tentativas   = envios.tentativas + excluded.tentativas,
+                    erro         = excluded.erro,
+                    enviado_em   = excluded.enviado_em,
+                    reservado_em = NULL
+                WHERE envios.ok = 0
+                """,
+                (
+                    data,
+                    chave,
+                    agente,
+                    payload_hash,
+                    resultado.get("status_code"),
+                    1 if resultado.get("ok") else 0,
+                    resultado.get("tentativas", 0),
+                    resultado.get("erro", ""),
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
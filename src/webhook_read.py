@@ -1,35 +1,325 @@
+"""
+webhook_read.py
+Recebe os webhooks do Read IA e grava cada payload em data/read_payloads/.
+Reentregas (o Read IA reenvia quando a resposta demora) são descartadas na entrada:
+chave session_id + trigger (ou hash do corpo), lembrada em data/read_webhook_vistos.txt.
+
+Rodar:
+  python webhook_read.py                          # dev (servidor do Flask, debug)
+  python webhook_read.py --prod --threads 16      # produção com waitress (1 processo, N threads)
+  python webhook_read.py --prod --servidor gunicorn --workers 4 --threads 8
+  gunicorn -w 4 --threads 8 -b 0.0.0.0:5000 "webhook_read:create_app()"
+  python webhook_read.py --prod --envio-imediato  # + manda cada meeting_end pro Forms na hora (envio_imediato.py)
+"""
+
 from flask import Flask, request
+import argparse
+import atexit
+import hashlib
 import json
+import os
+import queue
+import signal
+import sys
+import threading
+import uuid
 from pathlib import Path
 from datetime import datetime
 
-app = Flask(__name__)
+from read_ia import pasta_particao
 
 BASE_DIR = Path(__file__).resolve().parent.parent  # .../projeto1python
 PASTA = BASE_DIR / "data" / "read_payloads"
 PASTA.mkdir(parents=True, exist_ok=True)
 
-@app.post("/read-webhook")
-def read_webhook():
-    data = request.get_json(force=True, silent=True) or {}
+# o handler só enfileira o corpo cru; uma thread grava em disco em lotes
+FILA_MAX = int(os.getenv("READ_WEBHOOK_FILA_MAX", "1000"))
+LOTE_MAX = 100  # payloads por rodada de fsync
+
+_fila: queue.Queue = queue.Queue(maxsize=FILA_MAX)
+_FIM = object()
+
+# modo por evento: cada meeting_end gravado vai pro envio_imediato (Forms na hora)
+ENVIO_IMEDIATO = bool(os.getenv("READ_ENVIO_IMEDIATO"))
+
+# chaves já recebidas: set em memória + arquivo só de acréscimo (uma chave por linha),
+# relido do ponto onde parou a cada chave nova (pega o que outros workers gravaram)
+VISTOS_PATH = BASE_DIR / "data" / "read_webhook_vistos.txt"
+_vistos: set[str] = set()
+_vistos_offset = 0
+_suprimidos = 0
+_lock_vistos = threading.Lock()
+
+_lock_escritor = threading.Lock()
+_thread_escritor: threading.Thread | None = None
+_pid_escritor: int | None = None
+
+
+def _nome_arquivo(ts: str, session_id: str) -> str:
+    # sufixo aleatório: dois payloads sem session_id no mesmo segundo (ou em workers
+    # diferentes) não podem cair no mesmo arquivo
+    session_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(session_id))
+    return f"read_{ts}_{session_id}_{uuid.uuid4().hex[:12]}.json"
+
+
+def _ler_json(corpo: bytes) -> dict:
+    try:
+        data = json.loads(corpo)
+    except Exception:
+        data = None
+    return data if isinstance(data, dict) else {}
+
+
+def _chave_dedup(data: dict, corpo: bytes) -> str:
+    session_id = str(data.get("session_id") or "").strip()
+    trigger = str(data.get("trigger") or "").strip().lower()
+    if session_id and trigger:
+        chave = f"{session_id}|{trigger}"
+    else:
+        chave = "sha256|" + hashlib.sha256(corpo).hexdigest()
+    return chave.replace("\n", " ").replace("\r", " ")
+
+
+def _atualizar_vistos() -> None:
+    # chamar com _lock_vistos; lê só o que entrou no arquivo desde a última vez (na 1ª, tudo)
+    global _vistos_offset
+    try:
+        with open(VISTOS_PATH, "rb") as f:
+            f.seek(_vistos_offset)
+            novo = f.read()
+    except FileNotFoundError:
+        return
+    fim = novo.rfind(b"\n") + 1  # linha pela metade (outro worker escrevendo) fica pra próxima
+    for linha in novo[:fim].decode("utf-8", "replace").splitlines():
+        if linha:
+            _vistos.add(linha)
+    _vistos_offset += fim
+
+
+def _registrar_vistos(chaves: list[str]) -> None:
+    # depois do fsync dos payloads: uma escrita só (O_APPEND) com as chaves do lote
+    VISTOS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(VISTOS_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, "".join(c + "\n" for c in chaves).encode("utf-8"))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _gravar_lote(lote: list[tuple[bytes, str, str, dict]]) -> list[tuple[Path, dict]]:
+    """Grava o lote (durável no retorno) e devolve [(arquivo, payload)] do que foi gravado."""
+    abertos = []
+    pastas = set()
+    for corpo, ts, _, data in lote:
+        session_id = data.get("session_id", "no_session")
+        # meeting_end vai para a partição da data local; outros triggers para _outros/
+        pasta = pasta_particao(PASTA, data)
+        pasta.mkdir(parents=True, exist_ok=True)
+        path = pasta / _nome_arquivo(ts, session_id)
+
+        # grava em .tmp e só renomeia depois do fsync (o read_ia nunca vê arquivo pela metade)
+        tmp = path.with_name(path.name + ".tmp")
+        f = open(tmp, "xb")
+        f.write(corpo)
+        abertos.append((f, tmp, path, data))
+        pastas.add(pasta)
+
+    # fsync em lote: um por arquivo no fim da rodada + um por pasta (não dá em pasta no Windows)
+    for f, tmp, path, _ in abertos:
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        os.replace(tmp, path)
+
+    if os.name != "nt":
+        for pasta in pastas:
+            fd = os.open(pasta, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    _registrar_vistos([chave for _, _, chave, _ in lote])
+    return [(path, data) for _, _, path, data in abertos]
+
+
+def _escritor():
+    while True:
+        lote = [_fila.get()]
+        while len(lote) < LOTE_MAX:
+            try:
+                lote.append(_fila.get_nowait())
+            except queue.Empty:
+                break
+
+        fim = any(item is _FIM for item in lote)
+        payloads = [item for item in lote if item is not _FIM]
+        try:
+            if payloads:
+                gravados = _gravar_lote(payloads)
+                if ENVIO_IMEDIATO:
+                    _entregar_envio_imediato(gravados)
+        except Exception as e:
+            print(f"❌ Falha ao gravar {len(payloads)} payload(s): {e}")
+            # não ficaram gravados: a próxima reentrega do Read IA tem que passar
+            with _lock_vistos:
+                _vistos.difference_update(chave for _, _, chave, _ in payloads)
+        finally:
+            for _ in lote:
+                _fila.task_done()
+
+        if fim:
+            return
+
+
+def _entregar_envio_imediato(gravados: list[tuple[Path, dict]]) -> None:
+    import envio_imediato
+
+    for path, data in gravados:
+        if (data.get("trigger") or "").strip().lower() == "meeting_end":
+            envio_imediato.enfileirar(path, data)
 
-    session_id = data.get("session_id", "no_session")
+
+def _garantir_escritor():
+    # a thread é por processo: com gunicorn (fork) cada worker sobe a sua (e a sua fila)
+    global _fila, _thread_escritor, _pid_escritor
+    with _lock_escritor:
+        if _pid_escritor == os.getpid() and _thread_escritor.is_alive():
+            return
+        if _pid_escritor is not None and _pid_escritor != os.getpid():
+            _fila = queue.Queue(maxsize=FILA_MAX)
+        _thread_escritor = threading.Thread(target=_escritor, name="read-webhook-escritor", daemon=True)
+        _thread_escritor.start()
+        _pid_escritor = os.getpid()
+
+
+@atexit.register
+def _encerrar():
+    # desligando: grava o que ainda está na fila antes de sair
+    if _pid_escritor != os.getpid() or not _thread_escritor.is_alive():
+        return
+    _fila.put(_FIM)
+    _thread_escritor.join(timeout=30)
+
+
+def _ao_sigterm(*_):
+    # systemd/docker stop mandam SIGTERM, e o padrão do Python sai sem rodar o atexit:
+    # o que estava na fila (já confirmado pro Read IA com 200) se perderia
+    _encerrar()
+    sys.exit(0)
+
+
+def read_webhook():
+    global _suprimidos
+    corpo = request.get_data()
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    path = PASTA / f"read_{ts}_{session_id}.json"
+    data = _ler_json(corpo)
+    chave = _chave_dedup(data, corpo)
 
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    with _lock_vistos:
+        if chave not in _vistos:
+            _atualizar_vistos()
+        if chave in _vistos:
+            # reentrega: já temos (ou já está na fila); confirma sem gravar de novo
+            _suprimidos += 1
+            return {"ok": True, "duplicado": True}
+        _vistos.add(chave)
+
+    _garantir_escritor()
+    try:
+        _fila.put_nowait((corpo, ts, chave, data))
+    except queue.Full:
+        with _lock_vistos:
+            _vistos.discard(chave)
+        # backpressure: o Read IA tenta de novo depois
+        return {"ok": False, "erro": "fila cheia"}, 503, {"Retry-After": "5"}
     return {"ok": True}
-@app.post("/")
-def root_post():
-    # fallback: se o Read IA mandar pra "/"
-    return read_webhook()
 
-@app.post("/read-webhook/")
-def read_webhook_slash():
+
+def health():
+    dados = {
+        "ok": True,
+        "fila": _fila.qsize(),
+        "fila_max": FILA_MAX,
+        "duplicados_suprimidos": _suprimidos,
+        "chaves_vistas": len(_vistos),
+        "pid": os.getpid(),
+    }
+    if ENVIO_IMEDIATO:
+        import envio_imediato
+
+        dados["envio_imediato"] = envio_imediato.status()
+    return dados
+
+
+def create_app() -> Flask:
+    """App factory (serve pro waitress, gunicorn ou o servidor de dev)."""
+    app = Flask(__name__)
+    app.add_url_rule("/read-webhook", "read_webhook", read_webhook, methods=["POST"])
+    # fallback: se o Read IA mandar pra "/"
+    app.add_url_rule("/", "root_post", read_webhook, methods=["POST"])
     # fallback: se vier com barra no final
-    return read_webhook()
+    app.add_url_rule("/read-webhook/", "read_webhook_slash", read_webhook, methods=["POST"])
+    app.add_url_rule("/health", "health", health, methods=["GET"])
+    with _lock_vistos:
+        _atualizar_vistos()
+    _garantir_escritor()
+    return app
 
 
-if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+app = create_app()
+
+
+def _servir_gunicorn(host: str, porta: int, workers: int, threads: int):
+    from gunicorn.app.base import BaseApplication
+
+    class _App(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{porta}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("threads", threads)
+
+        def load(self):
+            return create_app()
+
+    _App().run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Receptor de webhooks do Read IA.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--porta", type=int, default=5000)
+    parser.add_argument("--prod", action="store_true", help="servidor de produção em vez do dev do Flask")
+    parser.add_argument("--servidor", choices=["waitress", "gunicorn"], default="waitress")
+    parser.add_argument("--workers", type=int, default=2, help="processos (só gunicorn)")
+    parser.add_argument("--threads", type=int, default=8, help="threads por processo")
+    parser.add_argument(
+        "--envio-imediato", action="store_true",
+        help="envia cada meeting_end pro Forms assim que chega (o main do fim do dia só manda o resto)",
+    )
+    args = parser.parse_args()
 
+    if args.envio_imediato:
+        global ENVIO_IMEDIATO
+        ENVIO_IMEDIATO = True
+        os.environ["READ_ENVIO_IMEDIATO"] = "1"  # pro processo filho do reloader do Flask (dev)
+
+    # dev e waitress rodam no processo principal (gunicorn: cada worker sai pelo sys.exit → atexit)
+    signal.signal(signal.SIGTERM, _ao_sigterm)
+
+    if not args.prod:
+        app.run(host=args.host, port=args.porta, debug=True)
+        return
+
+    print(f"🚀 Read webhook ({args.servidor}) em {args.host}:{args.porta}")
+    if args.servidor == "gunicorn":
+        _servir_gunicorn(args.host, args.porta, args.workers, args.threads)
+    else:
+        from waitress import serve
+
+        serve(app, host=args.host, port=args.porta, threads=args.threads)
+
+
+if __name__ == "__main__":
+    main()